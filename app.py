@@ -1,158 +1,453 @@
+import time
+_import_started = time.perf_counter()
+import atexit
 import datetime
-import speech_recognition as sr
-import pyttsx3
+import sys
+import tempfile
+import threading
 import requests
 import webbrowser
-import time
 import os
 import json
-import geocoder
-import cohere
-from googletrans import Translator
+import io
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from gtts import gTTS
-import tempfile
-import pygame 
-from youtube_search import YoutubeSearch  # Added for YouTube search
+import asr
+import lazy
+import tracing
+from lazy import lazy_import, timed
+from file_index import FileIndex
+from messages import Catalog
+from prompt_bundle import PromptBundle, write_bundle
+from tts_cache import AudioCache, cache_key
+from tts_stream import StreamingSynthesizer
+from audio_output import PygameSink, SpeechWorker
+from mic_stream import MicrophoneSource, MicStream, WebRtcVAD
+from intent_router import Intent, IntentRouter, normalize
+from session import current_session
+from http_client import HttpClient
+from geolocation import Locator, Provider
+from llm_stream import stream_sentences
+from llm_cache import Conversation, ResponseCache, estimate_tokens, is_follow_up
+from video_search import VideoSearch, pick_video
+
+# Heavy integrations are imported on first use; most commands need none of them
+pyttsx3 = lazy_import("pyttsx3")
+geocoder = lazy_import("geocoder")
+cohere = lazy_import("cohere")
+gtts = lazy_import("gtts")
+youtube_search = lazy_import("youtube_search")
 
 # Load environment variables
 load_dotenv()
 WEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 IPINFO_TOKEN = os.getenv("IPINFO_TOKEN")
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-
-# Global variables for interruptible speech
-speech_active = False
-current_speech_thread = None
-
-# Language Configuration
-LANGUAGES = {
-    "en": {
-        "welcome": "Welcome back ",
-        "assist_today": "How can I assist you today?",
-        "help": "How may I help?",
-        "weather_response": "The current temperature in {city}, {country} is {temp}°C with {desc}",
-        "language_set": "Language switched to English",
-        "ai_thinking": "Let me think about that",
-        "no_command": "I didn't recognize that command",
-        "goodbye": "Goodbye!",
-        "yes_response": "Yes",
-        "playing": "Playing on YouTube",
-        "search_query": "What would you like to play?"
-    },
-    "hi": {
-        "welcome": "स्वागत है !!",
-        "assist_today": "आज मैं आपकी कैसे सहायता करूँ?",
-        "help": "मैं कैसे मदद करूं?",
-        "weather_response": "{city}, {country} में वर्तमान तापमान {temp}°C है और {desc}",
-        "language_set": "हिंदी में बदल गया",
-        "ai_thinking": "मुझे इसके बारे में सोचने दो",
-        "no_command": "मैं उस आदेश को नहीं पहचान पाया",
-        "goodbye": "अलविदा!",
-        "yes_response": "हाँ",
-        "playing": "यूट्यूब पर चल रहा है",
-        "search_query": "आप क्या खेलना चाहेंगे?"
-    }
-}
-
-current_lang = "en"  # Default language
-# Initialize engine with thread-safe approach
-# Initialize engine directly without threading
-engine = pyttsx3.init()
-engine.setProperty('rate', 160)  # Set default speech rate
-engine.setProperty('volume', 0.9)
+DATA_DIR = os.getenv("JARVIS_DATA_DIR", os.path.expanduser("~/.jarvis"))
+WEATHER_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+IPINFO_URL = os.getenv("IPINFO_URL", "https://ipinfo.io")
+
+# How long API answers stay fresh
+WEATHER_TTL = 10 * 60  # Weather per city: minutes
+LOCATION_TTL = 10 * 60  # IP geolocation: the locator refreshes it in the background
+
+# Speak Cohere answers sentence by sentence while they are generated
+STREAM_LLM = os.getenv("JARVIS_STREAM_LLM", "1") != "0"
+# Answers to similar-enough questions are reused instead of asking Cohere again
+LLM_CACHE_THRESHOLD = float(os.getenv("JARVIS_LLM_CACHE_THRESHOLD", "0.85"))
+LLM_CACHE_TTL = 24 * 60 * 60
+LLM_CONTEXT_TOKENS = 400  # History kept in the prompt
+# Cohere requests in flight at once; more sessions than this wait their turn
+LLM_CONCURRENCY = int(os.getenv("JARVIS_LLM_CONCURRENCY", "8"))
+
+# Speech recognition: "google", or "vosk" for offline recognition with the
+# models in VOSK_MODEL_EN / VOSK_MODEL_HI
+ASR_BACKEND = os.getenv("JARVIS_ASR", "google")
+VOSK_MODELS = {"en": os.getenv("VOSK_MODEL_EN"), "hi": os.getenv("VOSK_MODEL_HI")}
+# Voice activity detection: "energy", or "webrtc" (pip install webrtcvad)
+VAD = os.getenv("JARVIS_VAD", "energy")
+# Silence that ends an utterance
+ENDPOINT_SECONDS = float(os.getenv("JARVIS_ENDPOINT_SECONDS", "0.3" if VAD == "webrtc" else "0.5"))
+LISTEN_TIMEOUT = 10  # Seconds to wait for speech to begin
+PHRASE_TIME_LIMIT = 8
+
+# Per-stage latency of every turn (see tracing.py); JARVIS_TRACE=0 turns it off
+tracing.tracer.configure(trace_path=os.path.join(DATA_DIR, "traces.jsonl"),
+                         metrics_path=os.path.join(DATA_DIR, "metrics.prom"))
+atexit.register(tracing.tracer.close)
+
+# Everything JARVIS says, by message ID, from locales/<lang>.json; a new
+# file there is a new language
+catalog = Catalog()
+
+def message(message_id, **params):
+    """The message in the current session's language"""
+    return catalog.text(current_session().lang, message_id, **params)
+
+def say(message_id, **params):
+    speak(message(message_id, **params))
+
+# The current language lives on the session (see session.py), default "en"
+
+# Common directories searched by "find file"
+SEARCH_DIRS = [
+    os.path.expanduser('~'),
+    'C:/',
+    os.path.expanduser('~/Documents'),
+    os.path.expanduser('~/Downloads')
+]
+file_index = FileIndex(SEARCH_DIRS, os.path.join(DATA_DIR, "file_index.pickle"))
+
+# The pyttsx3 engine is created on first use (or by warm_up())
+TTS_RATE = 160  # Set default speech rate
+TTS_VOICE = os.getenv("JARVIS_VOICE")  # pyttsx3 voice id; unset keeps the system voice
+engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global engine
+    with _engine_lock:
+        if engine is None:
+            with timed("pyttsx3.init()"):
+                engine = pyttsx3.init()
+                engine.setProperty('rate', TTS_RATE)
+                engine.setProperty('volume', 0.9)
+                if TTS_VOICE:
+                    engine.setProperty('voice', TTS_VOICE)
+    return engine
+
+# Rendered speech is cached on disk, so repeated prompts skip synthesis
+tts_cache = AudioCache(os.path.join(DATA_DIR, "tts_cache"))
+atexit.register(tts_cache.save)
+
+def speech_voice(lang):
+    """(language, voice, rate) that audio in `lang` is cached under"""
+    if lang == "en":
+        return "en", TTS_VOICE or "default", TTS_RATE  # Keyed on the configured voice
+    return lang, "gtts", 0
+
+def _synthesize_gtts(lang):
+    def synthesize(text, fp):
+        gtts.gTTS(text=text, lang=lang).write_to_fp(fp)
+    return synthesize
+
+# Other languages are synthesized by gTTS sentence by sentence, in parallel
+# and in memory; the first sentence plays while the rest are still being fetched
+GTTS_WORKERS = 4
+gtts_voices = {}
+_gtts_lock = threading.Lock()
+
+def get_gtts_voice(lang):
+    with _gtts_lock:
+        if lang not in gtts_voices:
+            gtts_voices[lang] = StreamingSynthesizer(_synthesize_gtts(lang), workers=GTTS_WORKERS, cache=tts_cache,
+                                                     voice=speech_voice(lang), ext=".mp3")
+        return gtts_voices[lang]
+
+def _synthesize_english(text, path):
+    tts = get_engine()
+    tts.save_to_file(text, path)
+    tts.runAndWait()
+
+# Fixed prompts pre-rendered by --build-prompts, played straight from memory
+PROMPT_BUNDLE = os.path.join(DATA_DIR, "prompts.bundle")
+prompts = PromptBundle(PROMPT_BUNDLE)
+
+def render_speech(text, lang=None):
+    """Return audio with the spoken text, synthesizing it on a cache miss.
+
+    Prompts from the bundle come back as in-memory clips; languages other
+    than English as a generator of clips, one per sentence.
+    """
+    lang = lang or current_session().lang
+    clip = prompts.get(cache_key(*speech_voice(lang), text))
+    if clip is not None:
+        return clip
+    if lang != "en":
+        return get_gtts_voice(lang).render(text)
+    return tts_cache.render(*speech_voice(lang), text, _synthesize_english, ".wav")
+
+# One playback thread owns the mixer; speak() only queues the utterance
+speech = SpeechWorker(PygameSink, render_speech)
+atexit.register(speech.close)
 
 def speak(text):
+    session = current_session()
+    if session.speak is not None:
+        session.speak(text)
+        return
     print(f"Jarvis: {text}")
+    speech.say(text, session.lang)
+
+def stop_speaking():
+    """Cut off the current utterance and drop anything still queued"""
+    speech.cancel()
+
+def _render_english_batch(texts, directory):
+    """Synthesize every text with one pyttsx3 run; yields (text, wav bytes)"""
+    tts = get_engine()
+    paths = [os.path.join(directory, f"{i}.wav") for i in range(len(texts))]
+    for text, path in zip(texts, paths):
+        tts.save_to_file(text, path)
+    tts.runAndWait()
+    for text, path in zip(texts, paths):
+        try:
+            with open(path, "rb") as fp:
+                yield text, fp.read()
+        except OSError as e:
+            print(f"Prompt Build Error: {e}")
+
+def _render_gtts(lang, text):
+    fp = io.BytesIO()
     try:
-        if current_lang == "hi":
-            # Hindi handling with gTTS
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as fp:
-                tts = gTTS(text=text, lang='hi')
-                tts.save(fp.name)
-                pygame.mixer.init()
-                pygame.mixer.music.load(fp.name)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                pygame.mixer.quit()
-                os.unlink(fp.name)
-        else:
-            # Direct pyttsx3 usage
-            engine.say(text)
-            engine.runAndWait()
+        _synthesize_gtts(lang)(text, fp)
     except Exception as e:
-        print(f"Speech Error: {e}")
-
-def listen():
-    """Simplified listening without interrupt checks"""
-    with sr.Microphone() as source:
-        print("Listening...")
-        recognizer = sr.Recognizer()
-        recognizer.adjust_for_ambient_noise(source)
-        try:
-            audio = recognizer.listen(source, timeout=10, phrase_time_limit=8)
-            query = recognizer.recognize_google(audio, language=current_lang if current_lang in ['en', 'hi'] else 'en-IN')
-            print(f"User: {query}")
-            return query.lower()
-        except sr.UnknownValueError:
-            return ""
-        except Exception as e:
-            print(f"Recognition Error: {e}")
+        print(f"Prompt Build Error: {e}")
+        return text, None
+    return text, fp.getvalue()
+
+def build_prompt_bundle(path=PROMPT_BUNDLE):
+    """Synthesize every message without parameters, in every language, into the prompt bundle.
+
+    Prompts that fail to render are left out of the bundle and reported as a RuntimeError.
+    """
+    global prompts
+    texts = {}
+    for lang, _, text in catalog.static_messages():
+        texts.setdefault(lang, {})[text] = None  # Keeps order, drops repeats
+    entries = []
+    with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(GTTS_WORKERS) as pool:
+        rendered = {lang: pool.map(lambda text, lang=lang: _render_gtts(lang, text), batch)
+                    for lang, batch in texts.items() if lang != "en"}
+        if "en" in texts:
+            rendered["en"] = _render_english_batch(list(texts["en"]), directory)
+        for lang, results in rendered.items():
+            ext = "wav" if lang == "en" else "mp3"
+            entries += [(cache_key(*speech_voice(lang), text), data, ext) for text, data in results if data]
+    count = write_bundle(path, entries)
+    if path == prompts.path:
+        prompts.close()
+        prompts = PromptBundle(path)
+    print(f"Rendered {count} prompts into {path}")
+    missing = sum(map(len, texts.values())) - count
+    if missing:
+        raise RuntimeError(f"{missing} prompts could not be rendered")
+    return count
+
+# The microphone stays open between turns and is calibrated only once
+asr_backend = None
+mic_stream = None
+_asr_lock = threading.Lock()
+_mic_lock = threading.Lock()
+
+def get_asr():
+    """The configured recognizer; Google when Vosk isn't available"""
+    global asr_backend
+    with _asr_lock:
+        if asr_backend is None:
+            backend = asr.GoogleRecognizer()
+            if ASR_BACKEND == "vosk":
+                try:
+                    with timed("vosk model"):
+                        vosk_backend = asr.VoskRecognizer(VOSK_MODELS)
+                        vosk_backend.load()
+                    backend = vosk_backend
+                except Exception as e:
+                    print(f"Vosk unavailable, using Google: {e}")
+            asr_backend = backend
+    return asr_backend
+
+def get_mic_stream():
+    global mic_stream
+    with _mic_lock:
+        if mic_stream is None:
+            with timed("microphone"):
+                source = MicrophoneSource()
+                vad = None
+                if VAD == "webrtc":
+                    try:
+                        vad = WebRtcVAD(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    except Exception as e:
+                        print(f"WebRTC VAD unavailable, using energy detection: {e}")
+                mic_stream = MicStream(source, pause_seconds=ENDPOINT_SECONDS,
+                                       phrase_time_limit=PHRASE_TIME_LIMIT, vad=vad).start()
+            atexit.register(mic_stream.close)
+    return mic_stream
+
+# While JARVIS speaks, only utterances this short can be a "stop" worth recognizing;
+# anything longer is taken for our own voice and never sent to the recognizer
+BARGE_IN_SECONDS = 1.2
+
+def _capture(started_after, timeout=LISTEN_TIMEOUT, barge_in=False):
+    """Recognize the next utterance; short early intents ("stop", "dim") return on a partial transcript.
+
+    With barge_in=True (while speaking) only a stop command is looked for,
+    and recognition is abandoned as soon as playback ends.
+    """
+    stream = get_mic_stream()
+    try:
+        if barge_in:
+            query, early = asr.transcribe(stream, get_asr(), current_session().lang, timeout, started_after,
+                                          early=is_stop_command, max_seconds=BARGE_IN_SECONDS,
+                                          until=lambda: not speech.speaking)
+        else:
+            query, early = asr.transcribe(stream, get_asr(), current_session().lang, timeout, started_after,
+                                          early=router.early_match)
+        if not query:
             return ""
+        utterance = stream.last_utterance  # None when acted on before the endpoint
+        if utterance is not None:
+            offset = time.perf_counter() - time.monotonic()
+            tracing.record("capture", utterance.speech_ended - utterance.started, end=utterance.speech_ended + offset)
+            tracing.record("endpoint", utterance.ended - utterance.speech_ended, end=utterance.ended + offset)
+        print(f"User: {query}" + (" (early)" if early else ""))
+        return query.lower()
+    except Exception as e:
+        print(f"Recognition Error: {e}")
+        return ""
+
+def listen(barge_in=True):
+    """Listen for a command, letting a stop command interrupt ongoing speech"""
+    session = current_session()
+    if session.listen is not None:
+        return session.listen()
+    print("Listening...")
+    started = time.monotonic()
+    if speech.speaking:
+        while barge_in and speech.speaking:
+            heard = _capture(started, timeout=0.1, barge_in=True)
+            if is_stop_command(heard):
+                stop_speaking()
+                return heard
+            # Anything else heard over our own voice is most likely the echo
+        speech.wait()
+        # Replies that begin right after the prompt ends count, even if we were still busy with the echo
+        started = speech.idle_since
+    return _capture(started)
         
+def perform(action, target=None):
+    """Carry out a side effect, or hand it to the session's frontend"""
+    session = current_session()
+    if session.act is not None:
+        return session.act(action, target)
+    if action == "open_url":
+        webbrowser.open(target)
+    elif action == "open_path":
+        os.startfile(target)
+    elif action == "lock":
+        os.system('rundll32.exe user32.dll,LockWorkStation')
+    elif action == "brightness":
+        import screen_brightness_control as sbc
+        sbc.set_brightness(target)
+
 def is_stop_command(text):
     return text and any(word in text for word in ["stop", "रुक", "cancel", "रद्द"])
 
+# YouTube results are cached on disk; "play despacito" and "play the despacito song" share an entry
+videos = VideoSearch(lambda query, count: youtube_search.YoutubeSearch(query, max_results=count).to_dict(),
+                     os.path.join(DATA_DIR, "youtube_cache.json"))
+
 def play_youtube_video(query=None):
     """Search and play YouTube video"""
     if not query:
-        speak(LANGUAGES[current_lang]["search_query"])
+        say("search_query")
         query = listen()
-        user_input = listen()
-        if is_stop_command(user_input):
-            speak(LANGUAGES[current_lang]["help"])
-            return  # or continue, or break, depending on your function context
+        if is_stop_command(query):
+            say("help")
+            return
 
         if not query:
             return
     
     try:
-        results = YoutubeSearch(query, max_results=1).to_dict()
-        if results:
-            video_url = f"https://youtube.com{results[0]['url_suffix']}"
-            speak(LANGUAGES[current_lang]["playing"])
-            webbrowser.open(video_url)
+        search = videos.prefetch(query)  # Runs while the prompt is spoken
+        say("playing")
+        video = pick_video(search.result(), query)
+        if video:
+            perform("open_url", f"https://youtube.com{video['url_suffix']}")
         else:
-            speak("No results found" if current_lang == "en" else "कोई परिणाम नहीं मिला")
+            say("youtube_no_results")
     except Exception as e:
         print(f"YouTube Error: {e}")
-        speak("Error playing video" if current_lang == "en" else "वीडियो चलाने में त्रुटि")
+        say("youtube_error")
+
+co = None
+llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+def get_cohere():
+    """The Cohere client, created on first use"""
+    global co
+    if co is None:
+        with timed("cohere.Client()"):
+            co = cohere.Client(COHERE_API_KEY)
+    return co
+
+def llm_failure_message():
+    return message("llm_failure")
 
 def ask_cohere(prompt):
     """Query Cohere's AI model for responses"""
     try:
-        speak(LANGUAGES[current_lang]["ai_thinking"])
-        response = co.generate(
-            model="command",  # Cohere's best general-purpose model
-            prompt=prompt,
-            max_tokens=100,  # Shorter responses to save tokens
-            temperature=0.7,  # Balance creativity vs. determinism
-        )
+        say("ai_thinking")
+        with llm_slots, tracing.stage("net:cohere"):
+            response = get_cohere().generate(
+                model="command",  # Cohere's best general-purpose model
+                prompt=prompt,
+                max_tokens=100,  # Shorter responses to save tokens
+                temperature=0.7,  # Balance creativity vs. determinism
+            )
         return response.generations[0].text
     except Exception as e:
         print(f"Cohere API Error: {e}")
-        return "I couldn't process that request" if current_lang == "en" else "मैं उस अनुरोध को संसाधित नहीं कर सका"
+        return llm_failure_message()
 
-
-def get_current_location():
-    """Get city and country using IP geolocation"""
+def ask_cohere_stream(prompt):
+    """Yield Cohere's answer one sentence at a time, as soon as each is generated"""
+    say("ai_thinking")
     try:
-        if IPINFO_TOKEN:
-            data = requests.get(f"https://ipinfo.io?token={IPINFO_TOKEN}", timeout=3).json()
-            return data.get('city', 'Unknown'), data.get('country', 'Unknown')
-        g = geocoder.ip('me')
-        return (g.city or 'Unknown', g.country or 'Unknown') if g.ok else (None, None)
+        with llm_slots, tracing.stage("net:cohere"):  # Until the last token
+            stream = get_cohere().generate(
+                model="command",
+                prompt=prompt,
+                max_tokens=100,
+                temperature=0.7,
+                stream=True,
+            )
+            yield from stream_sentences(chunk.text for chunk in stream)
+    except Exception as e:
+        print(f"Cohere API Error: {e}")
+        yield llm_failure_message()
+
+# Pooled connections and a response cache shared by every API call
+web = HttpClient(os.path.join(DATA_DIR, "http_cache.json"))
+
+# Not cached here: the locator keeps the last location and decides when it is stale
+def _ipinfo_location():
+    data = web.get_json(IPINFO_URL, params={"token": IPINFO_TOKEN}, timeout=3, name="ipinfo")
+    return data.get('city'), data.get('country', 'Unknown')
+
+def _geocoder_location():
+    def lookup():
+        with tracing.stage("net:geocoder"):
+            g = geocoder.ip('me')
+        return [g.city, g.country or 'Unknown'] if g.ok and g.city else None
+    return web.cached("geocoder.ip:me", 0, lookup)  # Coalesced with other callers, never stored
+
+# ipinfo (when we have a token) and geocoder race; the first good answer wins
+locator = Locator(
+    ([Provider("ipinfo", _ipinfo_location)] if IPINFO_TOKEN else []) + [Provider("geocoder", _geocoder_location)],
+    path=os.path.join(DATA_DIR, "last_location.json"),
+)
+
+def get_current_location(fresh=False):
+    """Get city and country using IP geolocation.
+
+    Unless fresh=True, the last known location is returned immediately and
+    refreshed in the background.
+    """
+    try:
+        location = locator.locate() if fresh else locator.locate_cached(refresh_after=LOCATION_TTL)
+        return location if location else (None, None)
     except Exception as e:
         print(f"Location Error: {e}")
         return None, None
@@ -163,68 +458,68 @@ def get_weather(city=None, country=None, use_current=False):
     try:
         params['q'] = f"{city or 'Delhi'},{country}" if use_current else city or None
         if not params['q']:
-            speak("Please specify location" if current_lang == "en" else "कृपया स्थान बताएं")
+            say("weather_need_location")
             return None
             
-        data = requests.get("http://api.openweathermap.org/data/2.5/weather", params=params, timeout=5).json()
+        data = web.get_json(WEATHER_URL, params=params, ttl=WEATHER_TTL, timeout=5, name="openweather")
         if data.get("cod") != 200:
             error = data.get("message", "Unknown error")
-            return f"Error: {error}" if current_lang == "en" else f"त्रुटि: {error}"
+            return message("weather_error", error=error)
 
-        return LANGUAGES[current_lang]["weather_response"].format(
+        return message(
+            "weather_response",
             city=data['name'],
             country=data['sys']['country'],
             temp=data['main']['temp'],
             desc=data['weather'][0]['description'].capitalize()
         )
     except requests.exceptions.Timeout:
-        return "Request timed out" if current_lang == "en" else "अनुरोध समय समाप्त"
+        return message("weather_timeout")
     except Exception as e:
         print(f"Weather Error: {e}")
-        return "Service unavailable" if current_lang == "en" else "सेवा उपलब्ध नहीं"
+        return message("weather_unavailable")
 
 def weather_assistant():
     """Interactive weather checking flow with stop support"""
     city, country = get_current_location()
     if city:
-        speak(f"I detect you're in {city}" if current_lang == "en" else f"मैंने पता लगाया आप {city} में हैं")
+        say("location_detected", city=city)
     while True:
-        speak("Current location or another place?" if current_lang == "en" else "वर्तमान स्थान या कोई अन्य स्थान?")
+        say("weather_which_place")
         choice = listen()
         if is_stop_command(choice):
-            speak(LANGUAGES[current_lang]["help"])
+            say("help")
             return
         elif "current place" in choice or "वर्तमान" in choice:
 
                city, country = get_current_location()
                if city and country:
-                  speak(f"Your current location is {city}, {country}" if current_lang == "en"
-              else f"आपका वर्तमान स्थान {city}, {country} है")
+                  say("current_location", city=city, country=country)
 
 
         elif "another place" in choice or "शहर" in choice:
 
-            speak("City name?" if current_lang == "en" else "शहर का नाम?")
+            say("weather_city")
             city_input = listen()
             if is_stop_command(city_input):
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             if not city_input: continue
-            speak("Country? (say skip)" if current_lang == "en" else "देश? (छोड़ने के लिए 'स्किप' कहें)")
+            say("weather_country")
             country_input = listen()
             if is_stop_command(country_input):
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             country = None if "skip" in country_input else country_input
             speak(get_weather(city_input, country))
         while True:
-            speak("Check another? (yes/no)" if current_lang == "en" else "क्या कोई और जांच करें? (हां/नहीं)")
+            say("weather_again")
             repeat = listen()
             if is_stop_command(repeat):
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             if "no" in repeat or "नहीं" in repeat:
-                speak(LANGUAGES[current_lang]["goodbye"])
+                say("goodbye")
                 return
             if "yes" in repeat or "हां" in repeat: break
 
@@ -232,234 +527,307 @@ def weather_assistant():
 def lock_windows():
     """Locks the Windows computer"""
     try:
-        os.system('rundll32.exe user32.dll,LockWorkStation')
-        speak("Windows locked" if current_lang == "en" else "विंडोज लॉक किया गया")
+        perform("lock")
+        say("locked")
     except Exception as e:
         print(f"Lock Error: {e}")
-        speak("Failed to lock" if current_lang == "en" else "लॉक करने में विफल")
+        say("lock_failed")
 def set_brightness(level):
     """Adjust screen brightness (0-100)"""
     try:
-        import screen_brightness_control as sbc
-        sbc.set_brightness(level)
-        speak(f"Brightness set to {level}%" if current_lang == "en" else f"चमक {level}% पर सेट की गई")
+        perform("brightness", level)
+        say("brightness_set", level=level)
     except Exception as e:
         print(f"Brightness Error: {e}")
-        speak("Brightness control failed" if current_lang == "en" else "चमक नियंत्रण विफल")
+        say("brightness_failed")
 def open_folder(path):
     """Open specified folder in file explorer"""
     try:
         if os.path.exists(path):
-            os.startfile(path)
-            speak(f"Opening {os.path.basename(path)}" if current_lang == "en" else f"{os.path.basename(path)} खोल रहा हूँ")
+            perform("open_path", path)
+            say("opening", name=os.path.basename(path))
         else:
-            speak("Folder not found" if current_lang == "en" else "फ़ोल्डर नहीं मिला")
+            say("folder_not_found")
     except Exception as e:
         print(f"Folder Error: {e}")
-        speak("Failed to open folder" if current_lang == "en" else "फ़ोल्डर खोलने में विफल")
+        say("folder_failed")
 def search_and_open_file():
     """Search for files and open them interactively, with repeat/continue support."""
     try:
-        speak("What file are you looking for?" if current_lang == "en" else "आप कौन सी फ़ाइल ढूंढ रहे हैं?")
+        say("file_query")
         search_query = listen()
         if is_stop_command(search_query):
-            speak(LANGUAGES[current_lang]["help"])
+            say("help")
             return
 
         if not search_query:
-            speak(LANGUAGES[current_lang]["help"])
+            say("help")
             return
 
-        speak("Searching..." if current_lang == "en" else "खोज रहा हूँ...")
-
-        # Search in common directories
-        search_dirs = [
-            os.path.expanduser('~'),
-            'C:/',
-            os.path.expanduser('~/Documents'),
-            os.path.expanduser('~/Downloads')
-        ]
-
-        matches = []
-        for root_dir in search_dirs:
-            for root, _, files in os.walk(root_dir):
-                for file in files:
-                    if search_query.lower() in file.lower():
-                        matches.append(os.path.join(root, file))
-                        if len(matches) >= 5:  # Limit to 5 matches
-                            break
-                if len(matches) >= 5:
-                    break
-            if len(matches) >= 5:
-                break
+        say("file_searching")
+
+        # Indexed lookup; the index refreshes itself in the background when stale
+        file_index.prepare()
+        matches = file_index.search(search_query, limit=5)
 
         if not matches:
-            speak("No files found" if current_lang == "en" else "कोई फाइल नहीं मिली")
-            speak(LANGUAGES[current_lang]["help"])
+            say("file_none")
+            say("help")
             return
 
         if len(matches) == 1:
-            os.startfile(matches[0])
-            speak(f"Opening {os.path.basename(matches[0])}" if current_lang == "en"
-                  else f"{os.path.basename(matches[0])} खोल रहा हूँ")
-            speak(LANGUAGES[current_lang]["help"])
+            perform("open_path", matches[0])
+            say("opening", name=os.path.basename(matches[0]))
+            say("help")
             return
 
         # Present multiple options
-        speak(f"I found {len(matches)} files:" if current_lang == "en"
-              else f"मुझे {len(matches)} फाइलें मिलीं:")
+        say("file_found", count=len(matches))
         for i, match in enumerate(matches[:5], 1):
-            speak(f"Option {i}: {os.path.basename(match)}" if current_lang == "en"
-                  else f"विकल्प {i}: {os.path.basename(match)}")
-            time.sleep(0.5)
+            say("file_option", number=i, name=os.path.basename(match))
 
         while True:
-            speak("Which one would you like to open? Say the number." if current_lang == "en"
-                  else "आप कौन सी खोलना चाहेंगे? नंबर बताएं।")
+            say("file_which")
             choice = listen()
             if is_stop_command(choice):
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             try:
                 index = int(choice) - 1
                 if 0 <= index < len(matches):
-                    os.startfile(matches[index])
-                    speak(f"Opening {os.path.basename(matches[index])}" if current_lang == "en"
-                          else f"{os.path.basename(matches[index])} खोल रहा हूँ")
-                    speak(LANGUAGES[current_lang]["help"])
+                    perform("open_path", matches[index])
+                    say("opening", name=os.path.basename(matches[index]))
+                    say("help")
                     return
                 else:
-                    speak("Invalid choice" if current_lang == "en" else "अमान्य विकल्प")
+                    say("file_invalid")
             except ValueError:
-                speak("I didn't understand your choice" if current_lang == "en"
-                      else "मैं आपका चयन नहीं समझ पाया")
+                say("file_not_understood")
 
             # Ask if user wants to repeat or continue
-            speak("Would you like to repeat the choice or continue? Say 'repeat' to try again or 'continue' to exit to main help." if current_lang == "en"
-                  else "क्या आप फिर से प्रयास करना चाहेंगे या मुख्य सहायता पर लौटना चाहेंगे? 'फिर से' कहें या 'जारी रखें' कहें।")
+            say("file_repeat_or_continue")
             follow_up = listen()
             if is_stop_command(follow_up):
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             if "continue" in follow_up or "जारी" in follow_up:
-                speak(LANGUAGES[current_lang]["help"])
+                say("help")
                 return
             # If "repeat" or anything else, the loop continues
 
     except Exception as e:
         print(f"File Search Error: {e}")
-        speak("Error during file search" if current_lang == "en" else "फाइल खोज में त्रुटि")
-        speak(LANGUAGES[current_lang]["help"])
+        say("file_error")
+        say("help")
 
 def wishMe():
     hour = int(datetime.datetime.now().hour)
     if hour >= 0 and hour < 12:
-        speak("Good Morning!")
+        say("good_morning")
     elif hour >= 12 and hour < 18:
-        speak("Good Afternoon!")
+        say("good_afternoon")
     else:
-        speak("Good Evening!")
-    
-def handle_command(command):
-    """Enhanced command handler with interrupt support"""
-    global current_lang
+        say("good_evening")
     
-    if not command:
-        return
-    # Language switching
-    if any(word in command for word in ["hindi", "हिंदी"]):
-        current_lang = "hi"
-        speak(LANGUAGES["hi"]["language_set"])
-        return
-    elif any(word in command for word in ["english", "अंग्रेजी"]):
-        current_lang = "en"
-        speak(LANGUAGES["en"]["language_set"])
-        return
-        
-    # YouTube playback
-    if "play" in command or "चलाओ" in command:
-        query = command.replace("play", "").replace("चलाओ", "").strip()
-        play_youtube_video(query if query else None)
-        return
-        
-    # Existing command processing
-    if "open google" in command or "गूगल" in command:
-        speak("Opening Google" if current_lang == "en" else "गूगल खोल रहा हूँ")
-        webbrowser.open("https://www.google.com")
-    elif "open youtube" in command or "यूट्यूब" in command:
-        speak("Opening YouTube" if current_lang == "en" else "यूट्यूब खोल रहा हूँ")
-        webbrowser.open("https://www.youtube.com")
-    elif "open youtube" in command or "यूट्यूब" in command:
-        speak("Opening  Linkedin" if current_lang == "en" else "लिंक्डइन खोल रहा हूँ")
-        webbrowser.open("https://www.Linkedin.com")
-    elif "weather" in command or "मौसम" in command:
-         speak("Fetching current location")
-         weather_assistant()
-    elif any(word in command for word in ["exit", "quit", "बंद"]):
-        speak(LANGUAGES[current_lang]["goodbye"])
-        exit()
-    elif any(phrase in command for phrase in [
-    "current location", "my current location", "tell my current location", "वर्तमान स्थान" ]):
-     city, country = get_current_location()
-     if city and country:
-                speak(f"Your current location is {city}, {country}" if current_lang == "en"
-                    else f"आपका वर्तमान स्थान {city}, {country} है")
-     else:
-                speak("Location unknown" if current_lang == "en" else "स्थान अज्ञात")
-
-    elif any(phrase in command.lower() for phrase in [
-    "lock windows", "windows lock", "windows band karo", "band karo windows",
-    "windows बंद करो", "लॉक विंडोज़", "lock my computer", "computer lock",
-    "windows बंद कर दो", "लॉक", "lock"]):
-     speak("Locking windows.." if current_lang == "en" else "विंडोज़ लॉक कर रहा हूँ")
-     lock_windows()
-
-    elif "dim" in command or "कम" in command:
-        set_brightness(30)  # Set to 30% brightness
-    elif "bright" in command or "तेज" in command:
-        set_brightness(100)  # Set to 100% brightness
-    elif "open downloads" in command or "डाउनलोड" in command:
-        speak("Opening downloads")
-        open_folder(os.path.expanduser('~/Downloads'))
-    elif "open documents" in command or "दस्तावेज़" in command:
-        speak("Opening Documents")
-        open_folder(os.path.expanduser('~/Documents'))
-    elif any(phrase in command for phrase in ["find file", "search file", "फाइल ढूंढो", "खोजो फाइल"]):
-        search_and_open_file()
-    elif "stop " in command :
-     if is_stop_command(command):
-        speak(LANGUAGES[current_lang]["help"])
+def switch_language(lang):
+    current_session().lang = lang
+    say("language_set")
+
+def open_website(site_id, url):
+    say("opening", name=message(site_id))
+    perform("open_url", url)
+
+def tell_current_location():
+    city, country = get_current_location()
+    if city and country:
+        say("current_location", city=city, country=country)
+    else:
+        say("location_unknown")
+
+def quit_assistant():
+    say("goodbye")
+    speech.wait()
+    exit()
+
+def play_command(command, match):
+    query = match.remainder(command)
+    play_youtube_video(query if query else None)
+
+def stop_command():
+    stop_speaking()  # main() asks "How may I help?" next
+
+def check_weather():
+    say("fetching_location")
+    weather_assistant()
+
+def lock_command():
+    say("locking")
+    speech.wait()  # speak() only queues; lock once the prompt has played
+    lock_windows()
+
+def open_common_folder(folder_id, path):
+    say("opening", name=message(folder_id))
+    open_folder(os.path.expanduser(path))
+
+# Every command JARVIS understands. Phrases only match whole words; when
+# several intents match, the higher priority wins, then the longer phrase.
+# A command that starts with "play" is always a play request; lock and exit
+# only count as the command's verb or as the whole command.
+# Early intents run as soon as a partial transcript is exactly one of their phrases.
+router = IntentRouter([
+    Intent("stop", lambda c, m: stop_command(), priority=100, early=True,
+           en=["stop", "cancel"], hi=["रुको", "रुक जाओ", "रद्द", "रद्द करो"]),
+    Intent("lock", lambda c, m: lock_command(), priority=95, anchor="verb",
+           en=["lock windows", "windows lock", "windows band karo", "band karo windows",
+               "lock my computer", "computer lock", "lock"],
+           hi=["windows बंद करो", "windows बंद कर दो", "लॉक विंडोज़", "लॉक", "लॉक करो"]),
+    Intent("exit", lambda c, m: quit_assistant(), priority=90, anchor="whole", en=["exit", "quit"], hi=["बंद"]),
+    Intent("play", play_command, priority=80, leading=True, en=["play"], hi=["चलाओ"]),
+    Intent("hindi", lambda c, m: switch_language("hi"), priority=70, en=["hindi"], hi=["हिंदी"]),
+    Intent("english", lambda c, m: switch_language("en"), priority=70, en=["english"], hi=["अंग्रेजी"]),
+    Intent("weather", lambda c, m: check_weather(), priority=65, en=["weather"], hi=["मौसम"]),
+    Intent("location", lambda c, m: tell_current_location(), priority=60,
+           en=["current location", "my current location", "tell my current location"],
+           hi=["वर्तमान स्थान"]),
+    Intent("find_file", lambda c, m: search_and_open_file(), priority=60,
+           en=["find file", "search file", "find a file", "search for a file"],
+           hi=["फाइल ढूंढो", "खोजो फाइल"]),
+    Intent("downloads", lambda c, m: open_common_folder("folder_downloads", "~/Downloads"), priority=60, early=True,
+           en=["open downloads"], hi=["डाउनलोड"]),
+    Intent("documents", lambda c, m: open_common_folder("folder_documents", "~/Documents"), priority=60, early=True,
+           en=["open documents"], hi=["दस्तावेज़"]),
+    Intent("google", lambda c, m: open_website("site_google", "https://www.google.com"), priority=50,
+           en=["open google"], hi=["गूगल"]),
+    Intent("youtube", lambda c, m: open_website("site_youtube", "https://www.youtube.com"), priority=50,
+           en=["open youtube"], hi=["यूट्यूब"]),
+    Intent("linkedin", lambda c, m: open_website("site_linkedin", "https://www.linkedin.com"), priority=50,
+           en=["open linkedin"], hi=["लिंक्डइन"]),
+    Intent("dim", lambda c, m: set_brightness(30), priority=40, early=True,
+           en=["dim", "dim the screen", "reduce brightness"], hi=["कम"]),
+    Intent("bright", lambda c, m: set_brightness(100), priority=40, early=True,
+           en=["bright", "brighter", "increase brightness"], hi=["तेज"]),
+])
+
+llm_cache = ResponseCache(threshold=LLM_CACHE_THRESHOLD, ttl=LLM_CACHE_TTL)
+
+def get_conversation():
+    session = current_session()
+    if session.conversation is None:
+        session.conversation = Conversation(LLM_CONTEXT_TOKENS)
+    return session.conversation
+
+def ask_llm(command):
+    lang = current_session().lang
+    conversation = get_conversation()
+    # The cache is shared by every session, so only answers that don't depend
+    # on this conversation ("and its population?") go through it
+    shareable = not is_follow_up(command)
+    cached = llm_cache.get(command, lang) if shareable else None
+    if cached is not None:
+        speak(cached)
+        conversation.add(command, cached)
         return
 
+    prompt = conversation.prompt(command)
+    if STREAM_LLM:
+        # speak() only queues, so each sentence plays while the next is generated
+        sentences = []
+        for sentence in ask_cohere_stream(prompt):
+            speak(sentence)
+            sentences.append(sentence)
+        ai_response = " ".join(sentences)
     else:
-        ai_response = ask_cohere(command)
+        ai_response = ask_cohere(prompt)
         speak(ai_response)
 
+    if ai_response.endswith(llm_failure_message()):
+        return  # Don't remember failures
+    conversation.add(command, ai_response)
+    if shareable:
+        llm_cache.put(command, ai_response, lang, tokens=estimate_tokens(prompt) + estimate_tokens(ai_response))
+
+# Intents that search or open this machine's files and folders
+HOST_FILE_INTENTS = {"find_file", "downloads", "documents"}
+
+def handle_command(command):
+    """Route a command to its intent, falling back to the language model"""
+    if not command:
+        return
+    command = normalize(command)
+    with tracing.stage("intent"):
+        match = router.match(command)
+    tracing.set_intent(match.intent.name if match else "llm")
+    with tracing.stage("handler"):
+        if match is None:
+            ask_llm(command)
+        elif match.intent.name in HOST_FILE_INTENTS and not current_session().host_files:
+            say("files_unavailable")
+        else:
+            match.intent.handler(command, match)
+
+def take_turn():
+    """Listen for one command and act on it, traced as a turn"""
+    with tracing.turn(current_session().id):
+        handle_command(listen())
+
+def run_turn():
+    """One pass of the main loop: prompt, listen, act"""
+    say("help")
+    take_turn()
+
+def warm_up():
+    """Initialize the speech engine, microphone and Cohere in the background"""
+    speech.warm_up(get_engine)  # pyttsx3 is used from the speech thread
+    def run():
+        for init in (get_mic_stream, get_asr, get_cohere):
+            try:
+                init()
+            except Exception as e:
+                print(f"Warm-up Error: {e}")
+    threading.Thread(target=run, name="warm-up", daemon=True).start()
+
+def profile_startup():
+    """Print what importing app.py and initializing each integration costs"""
+    for name, init in [("speech engine", get_engine), ("microphone", get_mic_stream),
+                       ("speech recognition", get_asr), ("cohere", get_cohere),
+                       ("gtts", lambda: gtts.gTTS), ("geocoder", lambda: geocoder.ip),
+                       ("youtube_search", lambda: youtube_search.YoutubeSearch)]:
+        try:
+            init()
+        except Exception as e:
+            print(f"{name}: {e}")
+    print(f"app.py import: {import_seconds * 1000:.1f} ms (eager modules only)")
+    print(lazy.report())
+
 def main():
+    file_index.refresh_in_background()  # Warm the file index while we talk
     # """Simplified main loop"""
     # wishMe()
-    # speak(LANGUAGES[current_lang]["welcome"])
-    # speak(LANGUAGES[current_lang]["assist_today"])
+    # say("welcome")
+    # say("assist_today")
     # command = listen()
     # if command:
     #         if any(word in command for word in ["exit", "quit", "बंद"]):
-    #             speak(LANGUAGES[current_lang]["goodbye"])
+    #             say("goodbye")
     #             return 
     #         handle_command(command)
+    say("help")
+    warm_up()  # While the first prompt plays
+    take_turn()
     while True:
-        speak(LANGUAGES[current_lang]["help"])
-        command = listen()
-        if command:
-            if any(word in command for word in ["exit", "quit", "बंद"]):
-                speak(LANGUAGES[current_lang]["goodbye"])
-                break
-            handle_command(command)
+        run_turn()
+
+import_seconds = time.perf_counter() - _import_started
 
 if __name__ == "__main__":
-    try:
-        recognizer = sr.Recognizer()
-        translator = Translator(service_urls=['translate.google.com'])
-        co = cohere.Client(COHERE_API_KEY)
-    except Exception as e:
-        print(f"Initialization failed: {e}")
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+        sys.exit()
+    if "--build-prompts" in sys.argv or "--prerender" in sys.argv:
+        try:
+            build_prompt_bundle()
+        except Exception as e:
+            print(f"Prompt Build Error: {e}")
+            sys.exit(1)
+        sys.exit()
     main()
\ No newline at end of file
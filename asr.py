@@ -0,0 +1,159 @@
+"""Speech recognition backends and streaming transcription of MicStream utterances.
+
+A backend's start(lang, sample_rate, sample_width) returns a recognition
+for one utterance.  Audio is fed to it chunk by chunk while the user is
+still talking; feed() returns the current partial hypothesis (or None when
+the backend has none) and finish() the final transcript, "" when nothing
+was understood.
+"""
+import json
+import threading
+import time
+
+import tracing
+from lazy import lazy_import
+
+sr = lazy_import("speech_recognition")
+vosk = lazy_import("vosk")
+
+
+class GoogleRecognizer:
+    """Google's web speech API through speech_recognition.
+
+    No partial results: the whole utterance is sent once it has ended.
+    """
+
+    name = "google"
+
+    def __init__(self):
+        self._recognizer = None
+
+    def start(self, lang, sample_rate, sample_width):
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        return _GoogleRecognition(self._recognizer, lang, sample_rate, sample_width)
+
+
+class _GoogleRecognition:
+    def __init__(self, recognizer, lang, sample_rate, sample_width):
+        self.recognizer = recognizer
+        self.language = lang if lang in ['en', 'hi'] else 'en-IN'
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        return None
+
+    def finish(self):
+        audio = sr.AudioData(b"".join(self.chunks), self.sample_rate, self.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).lower()
+        except sr.UnknownValueError:
+            return ""
+
+
+class VoskRecognizer:
+    """Offline recognition with local Vosk models (pip install vosk).
+
+    `model_paths` maps a language to an unpacked model directory from
+    https://alphacephei.com/vosk/models; languages without one use the
+    English model.  Models are loaded on first use (or by load()), which
+    takes a few seconds.  Decoding runs as the audio arrives, so partial
+    hypotheses are available while the user is talking and the final one
+    right after the endpoint.
+    """
+
+    name = "vosk"
+
+    def __init__(self, model_paths):
+        self.model_paths = {lang: path for lang, path in model_paths.items() if path}
+        if "en" not in self.model_paths:
+            raise ValueError("VoskRecognizer needs at least an English model")
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def load(self, lang="en"):
+        lang = lang if lang in self.model_paths else "en"
+        with self._lock:
+            if lang not in self._models:
+                vosk.SetLogLevel(-1)
+                with tracing.stage(f"load:vosk:{lang}"):
+                    self._models[lang] = vosk.Model(self.model_paths[lang])
+            return self._models[lang]
+
+    def start(self, lang, sample_rate, sample_width):
+        if sample_width != 2:
+            raise ValueError("Vosk needs 16-bit audio")
+        return _VoskRecognition(vosk.KaldiRecognizer(self.load(lang), sample_rate))
+
+
+class _VoskRecognition:
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.segments = []  # Text of segments Vosk has already finalized
+
+    def feed(self, chunk):
+        if self.recognizer.AcceptWaveform(chunk):
+            self.segments.append(json.loads(self.recognizer.Result())["text"])
+            partial = ""
+        else:
+            partial = json.loads(self.recognizer.PartialResult())["partial"]
+        return " ".join(t for t in self.segments + [partial] if t) or None
+
+    def finish(self):
+        self.segments.append(json.loads(self.recognizer.FinalResult())["text"])
+        return " ".join(t for t in self.segments if t)
+
+
+BACKENDS = {"google": GoogleRecognizer, "vosk": VoskRecognizer}
+
+
+def transcribe(stream, backend, lang, timeout=10, started_after=None, early=None, stable_seconds=0.15,
+               max_seconds=None, until=None):
+    """Recognize the next utterance of a MicStream; returns (text, early).
+
+    The utterance is fed to the backend while it is being spoken.  When
+    early(partial) accepts a partial hypothesis that has stayed the same for
+    `stable_seconds`, it is returned at once (early=True) without waiting
+    for the endpoint or the final transcript.  Otherwise the final
+    transcript is returned, or "" when nobody spoke within `timeout`.
+    Utterances longer than `max_seconds`, or still going when until()
+    becomes true, are given up on without a final transcript.
+    """
+    recognition = None
+    candidate = None
+    since = 0.0
+    max_bytes = None if max_seconds is None else int(max_seconds * stream.sample_rate) * stream.sample_width
+    size = 0
+    for chunk in stream.utterance_chunks(timeout, started_after):
+        if until is not None and until():
+            return "", False
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            return "", False
+        if recognition is None:
+            recognition = backend.start(lang, stream.sample_rate, stream.sample_width)
+        partial = recognition.feed(chunk)
+        if early is None or not partial:
+            continue
+        now = time.monotonic()
+        if partial != candidate:
+            candidate, since = partial, now
+        if now - since >= stable_seconds and early(candidate):
+            return candidate, True
+    if recognition is None:
+        return "", False
+    with tracing.stage("asr"):
+        return recognition.finish(), False
+
+
+def recognize(backend, frames, lang, sample_rate, sample_width, chunk_seconds=0.1):
+    """Transcribe a complete recording of raw PCM frames; "" when nothing was understood"""
+    recognition = backend.start(lang, sample_rate, sample_width)
+    step = int(sample_rate * chunk_seconds) * sample_width
+    for i in range(0, len(frames), step):
+        recognition.feed(frames[i:i + step])
+    with tracing.stage("asr"):
+        return recognition.finish()
@@ -0,0 +1,200 @@
+"""Background speech playback with queueing and barge-in"""
+import contextvars
+import queue
+import threading
+import time
+
+import tracing
+
+_WARM_UP = object()  # Queue marker: run pending warm-ups
+
+
+class PygameSink:
+    """Plays audio files and in-memory clips through one long-lived pygame mixer"""
+
+    def __init__(self):
+        import pygame
+        pygame.mixer.init()
+        self.music = pygame.mixer.music
+
+    def play(self, clip):
+        if hasattr(clip, "read"):
+            self.music.load(clip, getattr(clip, "format", "mp3"))  # The name hint tells pygame the format
+        else:
+            self.music.load(clip)
+        self.music.play()
+
+    def busy(self):
+        return self.music.get_busy()
+
+    def stop(self):
+        self.music.stop()
+
+
+class NullSink:
+    """Sink that plays nothing; each clip "lasts" `duration` seconds"""
+
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.played = []
+        self.started_at = []
+        self._until = 0.0
+
+    def play(self, clip):
+        self.played.append(clip)
+        self.started_at.append(time.perf_counter())
+        self._until = time.monotonic() + self.duration
+
+    def busy(self):
+        return time.monotonic() < self._until
+
+    def stop(self):
+        self._until = 0.0
+
+
+class SpeechWorker:
+    """Long-lived thread that renders and plays queued utterances in order.
+
+    `sink_factory` is called on the worker thread, so the mixer is created
+    once and only ever touched from there.  The thread starts on the first
+    say(), so processes that never speak aloud never open an audio device.
+    `render(text, lang)` returns a playable path, or an iterable of clips
+    (paths or file objects) that are played back to back as they arrive.  cancel() drops everything
+    queued and cuts off the clip that is currently playing.  warm_up() runs
+    slow setup on the worker thread, overlapped with playback when something
+    is already queued.  Each utterance is rendered and played in a copy of
+    the context say() was called from, so its synthesis and playback are
+    traced as part of that turn.
+    """
+
+    def __init__(self, sink_factory, render, poll_interval=0.01):
+        self.render = render
+        self.poll_interval = poll_interval
+        self.sink = None
+        self._sink_factory = sink_factory
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self.idle_since = time.monotonic()  # When the last utterance finished playing
+        self._thread = None
+        self._warm_ups = []
+
+    @property
+    def speaking(self):
+        return not self._idle.is_set()
+
+    def say(self, text, lang):
+        """Queue an utterance and return immediately"""
+        with self._lock:
+            self._start()
+            self._pending += 1
+            self._idle.clear()
+            self._queue.put((self._generation, text, lang, contextvars.copy_context()))
+
+    def warm_up(self, fn):
+        """Call `fn` on the worker thread, while the next queued clip plays"""
+        with self._lock:
+            self._start()
+            self._warm_ups.append(fn)
+            self._queue.put(_WARM_UP)
+
+    def cancel(self):
+        """Stop the current utterance and forget everything queued behind it"""
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _WARM_UP:
+                    self._done()
+        if self.sink is not None:
+            self.sink.stop()
+
+    def wait(self, timeout=None):
+        """Block until everything queued so far has been spoken (or cancelled)"""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        self.cancel()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=1)
+
+    def _start(self):
+        # Caller holds self._lock
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+            self._thread.start()
+
+    def _run_warm_ups(self):
+        while self._warm_ups:
+            fn = self._warm_ups.pop(0)
+            try:
+                fn()
+            except Exception as e:
+                print(f"Warm-up Error: {e}")
+
+    def _done(self):
+        # Caller holds self._lock
+        self._pending -= 1
+        if self._pending == 0:
+            self.idle_since = time.monotonic()
+            self._idle.set()
+
+    def _run(self):
+        try:
+            self.sink = self._sink_factory()
+        except Exception as e:
+            print(f"Audio Output Error: {e}")
+            self.sink = NullSink()
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if item is _WARM_UP:
+                if self._queue.empty():
+                    self._run_warm_ups()
+                else:
+                    self._queue.put(item)  # Let the clip ahead of it start first
+                continue
+            generation, text, lang, context = item
+            try:
+                context.run(self._speak, generation, text, lang)
+            except Exception as e:
+                print(f"Speech Error: {e}")
+            finally:
+                with self._lock:
+                    self._done()
+
+    def _speak(self, generation, text, lang):
+        if generation != self._generation:
+            return
+        clips = self.render(text, lang)
+        if isinstance(clips, str) or hasattr(clips, "read"):
+            clips = [clips]
+        clips = iter(clips)
+        try:
+            with tracing.stage("synthesis"):  # Until the first clip can play
+                clip = next(clips, None)
+            if clip is None or generation != self._generation:
+                return
+            with tracing.stage("playback"):
+                self.sink.play(clip)
+                self._run_warm_ups()
+                while generation == self._generation:
+                    if not self.sink.busy():
+                        clip = next(clips, None)  # Usually synthesized while the last one played
+                        if clip is None or generation != self._generation:
+                            break
+                        self.sink.play(clip)
+                    time.sleep(self.poll_interval)
+        finally:
+            close = getattr(clips, "close", None)
+            if close is not None:
+                close()
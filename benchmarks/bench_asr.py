@@ -0,0 +1,209 @@
+"""End-of-speech-to-action latency per ASR backend and endpointing setup, from WAV files.
+
+A test set is a directory of 16 kHz mono 16-bit WAVs and a manifest.json:
+
+    [{"file": "stop.wav", "text": "stop", "speech_end": 0.62, "lang": "en"}, ...]
+
+where speech_end is the second at which speech stops in the file.  Without
+--test-set a synthetic set is generated.  Every file is replayed in real
+time through WavSource -> MicStream -> asr.transcribe(), and latency runs
+from the end of speech to the command being routed to its intent.
+
+Backends:
+  google     speech_recognition's Google API, answered by the local stand-in
+             from fakes.py after --asr-ms
+  streaming  a simulated local streaming recognizer: each word shows up in
+             the partial hypothesis --lag-ms after it is spoken, and the
+             final transcript --final-ms after the endpoint
+  vosk       a real Vosk model (--vosk-model); needs real recordings
+
+    python benchmarks/bench_asr.py
+    python benchmarks/bench_asr.py --test-set recordings/ --vosk-model models/vosk-model-small-en-us-0.15
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_mic_stream import write_utterance  # noqa: E402
+from fakes import FakeServices, install_fake_modules  # noqa: E402
+
+# (text, lang) of the synthetic test set
+SYNTHETIC = [
+    ("stop", "en"), ("dim", "en"), ("open downloads", "en"), ("bright", "en"), ("रुको", "hi"),
+    ("what is the weather in london", "en"), ("play despacito", "en"), ("open google", "en"),
+]
+
+
+def synthetic_test_set(directory, rng):
+    manifest = []
+    for i, (text, lang) in enumerate(SYNTHETIC):
+        seconds = 0.3 + 0.12 * len(text.split()) + 0.03 * len(text)
+        write_utterance(os.path.join(directory, f"{i}.wav"), seconds, rng)
+        manifest.append({"file": f"{i}.wav", "text": text, "speech_end": 0.2 + seconds, "lang": lang})
+    return manifest
+
+
+class Script:
+    """The transcript of the utterance being played, for the simulated and stand-in backends"""
+    text = ""
+    speech_end = 0.0
+
+
+class SimulatedStreaming:
+    """Reveals the scripted transcript word by word as the audio comes in"""
+
+    name = "streaming"
+
+    def __init__(self, script, lag, final_delay):
+        self.script = script
+        self.lag = lag
+        self.final_delay = final_delay
+
+    def start(self, lang, sample_rate, sample_width):
+        return _SimulatedRecognition(self, sample_rate * sample_width)
+
+
+class _SimulatedRecognition:
+    def __init__(self, backend, bytes_per_second):
+        self.backend = backend
+        self.bytes_per_second = bytes_per_second
+        self.fed = 0
+        self.words = backend.script.text.split()
+
+    def feed(self, chunk):
+        self.fed += len(chunk)
+        heard = self.fed / self.bytes_per_second - self.backend.lag
+        # The stream starts with ~0.3 s of pre-roll; speech then runs until speech_end
+        fraction = (heard - 0.3) / max(0.1, self.backend.script.speech_end - 0.5)
+        count = min(len(self.words), max(0, math.ceil(fraction * len(self.words))))
+        return " ".join(self.words[:count]) or None
+
+    def finish(self):
+        time.sleep(self.backend.final_delay)
+        return " ".join(self.words)
+
+
+def configurations(args, script, have_webrtc):
+    import asr
+    google = asr.GoogleRecognizer()
+    streaming = SimulatedStreaming(script, args.lag_ms / 1000, args.final_ms / 1000)
+    configs = [
+        ("google  energy 0.8s (old listen)", google, "energy", 0.8, False),
+        ("google  energy 0.5s", google, "energy", 0.5, False),
+        ("streaming  energy 0.5s", streaming, "energy", 0.5, False),
+        ("streaming  energy 0.5s  early", streaming, "energy", 0.5, True),
+    ]
+    if have_webrtc:
+        configs += [
+            ("google  webrtc 0.3s", google, "webrtc", 0.3, False),
+            ("streaming  webrtc 0.3s  early", streaming, "webrtc", 0.3, True),
+        ]
+    if args.vosk_model:
+        vosk = asr.VoskRecognizer({"en": args.vosk_model})
+        vosk.load()
+        configs += [
+            ("vosk  energy 0.5s", vosk, "energy", 0.5, False),
+            ("vosk  energy 0.5s  early", vosk, "energy", 0.5, True),
+        ]
+    return configs
+
+
+def run(config, manifest, directory, script, transcripts, router):
+    import asr
+    from mic_stream import MicStream, WavSource, WebRtcVAD
+
+    class TimedSource(WavSource):
+        """Notes when each file actually starts playing"""
+        file_started = None
+
+        def read(self):
+            if not self._current and self._pending:
+                self.file_started = time.monotonic()
+            return super().read()
+
+    label, backend, vad, pause, early = config
+    source = TimedSource(realtime=True)
+    stream = MicStream(source, calibration_seconds=0.3, pause_seconds=pause,
+                       vad=WebRtcVAD(source.SAMPLE_RATE) if vad == "webrtc" else None).start()
+    while not stream.calibrated:
+        time.sleep(0.01)
+    latencies, correct, early_count = [], 0, 0
+    try:
+        for item in manifest:
+            script.text, script.speech_end = item["text"], item["speech_end"]
+            transcripts.push(item["text"])
+            started = time.monotonic()
+            source.file_started = None
+            source.feed(os.path.join(directory, item["file"]))
+            text, was_early = asr.transcribe(stream, backend, item.get("lang", "en"), timeout=5,
+                                             started_after=started,
+                                             early=router.early_match if early else None)
+            match = router.match(text) if text else None
+            acted = time.monotonic()
+            expected = router.match(item["text"])
+            if (match and match.intent.name) == (expected and expected.intent.name) and text:
+                correct += 1
+            early_count += was_early
+            latencies.append(acted - (source.file_started + item["speech_end"]))
+            while source._current or source._pending or stream.in_speech:
+                time.sleep(0.01)  # Let the rest of an early-dispatched utterance play out
+    finally:
+        stream.close()
+    return label, latencies, correct, early_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--test-set", help="Directory with WAVs and manifest.json")
+    parser.add_argument("--asr-ms", type=float, default=250, help="Google stand-in latency")
+    parser.add_argument("--lag-ms", type=float, default=150, help="Simulated streaming partial lag")
+    parser.add_argument("--final-ms", type=float, default=30, help="Simulated streaming final decode time")
+    parser.add_argument("--vosk-model", help="Vosk model directory; adds the vosk backend")
+    args = parser.parse_args()
+
+    services = FakeServices({"asr": args.asr_ms / 1000}).start()
+    transcripts = install_fake_modules(services.url)
+    import app
+    try:
+        import webrtcvad  # noqa: F401
+        have_webrtc = True
+    except ImportError:
+        have_webrtc = False
+
+    workdir = None
+    try:
+        if args.test_set:
+            directory = args.test_set
+            with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as fp:
+                manifest = json.load(fp)
+        else:
+            directory = workdir = tempfile.mkdtemp(prefix="jarvis_asr_")
+            manifest = synthetic_test_set(directory, random.Random(0))
+
+        script = Script()
+        print(f"{len(manifest)} utterances; end of speech -> intent routed")
+        print(f"{'configuration':<34} {'mean ms':>8} {'p50 ms':>8} {'max ms':>8} {'correct':>8} {'early':>6}")
+        for config in configurations(args, script, have_webrtc):
+            label, latencies, correct, early = run(config, manifest, directory, script, transcripts, app.router)
+            print(f"{label:<34} {statistics.mean(latencies) * 1000:8.0f} "
+                  f"{statistics.median(latencies) * 1000:8.0f} {max(latencies) * 1000:8.0f} "
+                  f"{correct:>5}/{len(manifest):<2} {early:>6}")
+        if not have_webrtc:
+            print("(pip install webrtcvad to add the WebRTC VAD configurations)")
+    finally:
+        services.stop()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Latency of the speech worker measured against a null audio sink.
+
+Reports how long speak() blocks the caller, how long an utterance waits
+before playback starts and how quickly cancel() silences a long clip:
+
+    python benchmarks/bench_audio_output.py --utterances 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_output import NullSink, SpeechWorker  # noqa: E402
+
+
+def report(label, values):
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+    print(f"  {label:<28} mean {statistics.mean(values) * 1000:8.3f}ms   p95 {p95 * 1000:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=200)
+    parser.add_argument("--clip-ms", type=float, default=2000, help="Length of the clip used for barge-in")
+    args = parser.parse_args()
+
+    sink = NullSink()
+    worker = SpeechWorker(lambda: sink, lambda text, lang: text, poll_interval=0.001)
+
+    enqueue, start_delay = [], []
+    for i in range(args.utterances):
+        before = time.perf_counter()
+        worker.say(f"utterance {i}", "en")
+        enqueue.append(time.perf_counter() - before)
+        worker.wait()
+        start_delay.append(sink.started_at[-1] - before)
+
+    barge_in = []
+    sink.duration = args.clip_ms / 1000
+    for i in range(20):
+        worker.say("a long answer that the user interrupts", "en")
+        worker.say("queued follow-up that must never play", "en")
+        while not sink.busy():
+            time.sleep(0.0005)
+        before = time.perf_counter()
+        worker.cancel()
+        worker.wait()
+        barge_in.append(time.perf_counter() - before)
+    leaked = sum(1 for text in sink.played if text.startswith("queued"))
+    worker.close()
+
+    print(f"Utterances: {args.utterances}, barge-in trials: {len(barge_in)}")
+    report("speak() blocking time", enqueue)
+    report("queue to playback start", start_delay)
+    report("cancel() to silence", barge_in)
+    print(f"  Queued utterances played after cancel: {leaked}")
+
+
+if __name__ == "__main__":
+    main()
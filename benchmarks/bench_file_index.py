@@ -0,0 +1,119 @@
+"""Compare the persistent file index against the old os.walk search.
+
+Builds a synthetic tree (1M files by default) in a temporary directory and
+times both approaches on the same queries:
+
+    python benchmarks/bench_file_index.py --files 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_index import FileIndex  # noqa: E402
+
+WORDS = ["report", "invoice", "resume", "photo", "notes", "budget", "project",
+         "draft", "final", "summary", "holiday", "music", "lecture", "scan"]
+EXTENSIONS = [".pdf", ".docx", ".txt", ".jpg", ".mp3", ".xlsx", ".png"]
+
+
+def build_tree(root, files, per_dir, fanout=10):
+    """Create `files` empty files, `per_dir` to a directory, `fanout` subdirs per level"""
+    rng = random.Random(0)
+    created = 0
+    dir_no = 0
+    while created < files:
+        parts = []
+        n = dir_no
+        while True:
+            parts.append(f"d{n % fanout}")
+            n //= fanout
+            if not n:
+                break
+        directory = os.path.join(root, *reversed(parts))
+        os.makedirs(directory, exist_ok=True)
+        for _ in range(min(per_dir, files - created)):
+            name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{created}{rng.choice(EXTENSIONS)}"
+            open(os.path.join(directory, name), "w").close()
+            created += 1
+        dir_no += 1
+    return dir_no
+
+
+def legacy_search(search_dirs, query):
+    """The search loop search_and_open_file() used before the index"""
+    matches = []
+    for root_dir in search_dirs:
+        for root, _, files in os.walk(root_dir):
+            for file in files:
+                if query.lower() in file.lower():
+                    matches.append(os.path.join(root, file))
+                    if len(matches) >= 5:
+                        break
+            if len(matches) >= 5:
+                break
+        if len(matches) >= 5:
+            break
+    return matches
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--per-dir", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Don't delete the synthetic tree")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jarvis_bench_")
+    tree = os.path.join(workdir, "tree")
+    index_path = os.path.join(workdir, "file_index.pickle")
+    try:
+        print(f"Building synthetic tree with {args.files:,} files...")
+        elapsed, dirs = timed(build_tree, tree, args.files, args.per_dir)
+        print(f"  {dirs:,} directories in {elapsed:.1f}s")
+
+        last = f"_{args.files - 1}."  # Only exists in the very last directory
+        queries = ["resume", "pdf", "a", "holiday_music", last, "no_such_file"]
+
+        print("\nLegacy os.walk search (first 5 hits, unranked):")
+        for query in queries:
+            elapsed, hits = timed(legacy_search, [tree], query)
+            print(f"  {query!r:>20}: {elapsed * 1000:10.1f} ms  ({len(hits)} hits)")
+
+        index = FileIndex([tree], index_path)
+        elapsed, _ = timed(index.refresh)
+        print(f"\nIndex cold build: {elapsed:.2f}s ({len(index):,} names)")
+
+        index = FileIndex([tree], index_path)
+        elapsed, _ = timed(index.load)
+        print(f"Index load from disk: {elapsed:.2f}s")
+        elapsed, rescanned = timed(index.refresh)
+        print(f"Incremental refresh, nothing changed: {elapsed * 1000:.1f} ms ({rescanned} dirs re-read)")
+        open(os.path.join(tree, "d0", "fresh_resume.pdf"), "w").close()
+        elapsed, rescanned = timed(index.refresh)
+        print(f"Incremental refresh, one file added: {elapsed * 1000:.1f} ms ({rescanned} dirs re-read)")
+
+        print("\nIndexed search (top 5, ranked):")
+        for query in queries:
+            elapsed, hits = timed(index.search, query)
+            print(f"  {query!r:>20}: {elapsed * 1000:10.2f} ms  ({len(hits)} hits)")
+    finally:
+        if args.keep:
+            print(f"\nTree kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
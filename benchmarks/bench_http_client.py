@@ -0,0 +1,122 @@
+"""Requests saved by the shared HTTP client, measured against a local stub server.
+
+The stub answers like ipinfo.io and OpenWeatherMap after an injected delay.
+The same call pattern as the weather flow runs once with bare requests.get()
+and once through HttpClient, then again after a "restart" that reloads the
+cache from disk:
+
+    python benchmarks/bench_http_client.py --sessions 20 --latency-ms 150
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import HttpClient  # noqa: E402
+
+CITIES = ["delhi", "mumbai", "delhi", "london", "delhi", "mumbai"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is visible
+    latency = 0.0
+    requests = 0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests += 1
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/ipinfo":
+            body = {"city": "New Delhi", "country": "IN"}
+        else:
+            city = query.get("q", ["?"])[0].split(",")[0]
+            body = {"cod": 200, "name": city.title(), "sys": {"country": "IN"},
+                    "main": {"temp": 31.5}, "weather": [{"description": "haze"}]}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def weather_session(get, base):
+    """The calls one pass through weather_assistant() and "current location" make"""
+    get(f"{base}/ipinfo", {"token": "t"}, 6 * 3600)  # weather_assistant() start
+    get(f"{base}/ipinfo", {"token": "t"}, 6 * 3600)  # "current place"
+    for city in CITIES:
+        get(f"{base}/weather", {"q": city, "appid": "k", "units": "metric"}, 600)
+    get(f"{base}/ipinfo", {"token": "t"}, 6 * 3600)  # "current location" intent
+
+
+def run(label, get, base, sessions, burst):
+    StubHandler.requests = StubHandler.connections = 0
+    start = time.perf_counter()
+    for _ in range(sessions):
+        weather_session(get, base)
+    with ThreadPoolExecutor(max_workers=burst) as pool:  # Duplicate requests in flight together
+        list(pool.map(lambda _: get(f"{base}/weather", {"q": "paris", "appid": "k", "units": "metric"}, 600),
+                      range(burst)))
+    elapsed = time.perf_counter() - start
+    calls = sessions * (3 + len(CITIES)) + burst
+    print(f"  {label:<22} {calls:5} calls  {StubHandler.requests:5} requests  "
+          f"{StubHandler.connections:4} connections  {elapsed:7.2f}s")
+    return StubHandler.requests, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--burst", type=int, default=8, help="Identical requests issued concurrently")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    workdir = tempfile.mkdtemp(prefix="jarvis_http_")
+    cache_path = os.path.join(workdir, "http_cache.json")
+    try:
+        print(f"{args.sessions} weather sessions + {args.burst} concurrent duplicates, "
+              f"{args.latency_ms:.0f}ms server latency")
+        bare, bare_time = run("requests.get", lambda url, params, ttl: requests.get(url, params=params, timeout=5).json(),
+                              base, args.sessions, args.burst)
+        client = HttpClient(cache_path)
+        pooled, pooled_time = run("HttpClient", client.get_json, base, args.sessions, args.burst)
+        print(f"    cache hits {client.stats['cache_hits']}, coalesced {client.stats['coalesced']}")
+        restarted = HttpClient(cache_path)
+        warm, warm_time = run("HttpClient (restart)", restarted.get_json, base, args.sessions, args.burst)
+        print(f"\nRequests saved: {bare - pooled} of {bare} ({1 - pooled / bare:.0%}), "
+              f"{bare - warm} after restart")
+        print(f"Wall time: {bare_time:.2f}s -> {pooled_time:.2f}s ({warm_time:.2f}s after restart)")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
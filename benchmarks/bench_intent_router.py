@@ -0,0 +1,134 @@
+"""Routing throughput of the compiled intent router versus the old if/elif chain.
+
+Runs a corpus of English and Hindi transcripts through both and reports
+commands per second and how many would fall through to Cohere.  Exits with
+status 1 when the router sends a command to the wrong intent:
+
+    python benchmarks/bench_intent_router.py --repeat 2000
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import router  # noqa: E402
+from intent_router import Intent, IntentRouter  # noqa: E402
+
+# Command -> the intent it must route to (None = Cohere)
+EXPECTED = {
+    "open google": "google", "open youtube": "youtube", "open linkedin": "linkedin",
+    "play shape of you": "play", "play despacito on youtube": "play",
+    "what's the weather like": "weather", "weather": "weather",
+    "tell my current location": "location", "lock windows": "lock", "lock my computer": "lock",
+    "find file": "find_file", "search for a file": "find_file",
+    "open downloads": "downloads", "open documents": "documents",
+    "dim the screen": "dim", "make it bright": "bright", "switch to hindi": "hindi", "english please": "english",
+    "stop": "stop", "cancel that": "stop", "exit": "exit", "quit": "exit",
+    "what is the capital of france": None, "display the time": None, "who won the match yesterday": None,
+    "tell me a joke": None, "unlock the door": None, "how do clocks work": None, "explain black holes": None,
+    "is it bright outside": "bright", "what time is it in london": None,
+    # Song titles full of other commands' keywords
+    "play lock and key": "play", "play don't stop believing": "play", "play english man in new york": "play",
+    "stop the music": "stop", "lock the screen and play music": "lock",
+    # Disruptive commands mentioned in passing
+    "i need to lock in on my studies": None, "quit smoking tips": None, "how do i exit vim": None,
+    "lock the screen": "lock", "स्क्रीन लॉक करो": "lock", "दरवाज़ा बंद करो": None,
+    "गूगल खोलो": "google", "यूट्यूब खोलो": "youtube", "शीप ऑफ़ यू चलाओ": "play", "आज का मौसम कैसा है": "weather",
+    "मेरा वर्तमान स्थान बताओ": "location", "windows बंद करो": "lock", "लॉक विंडोज़": "lock", "फाइल ढूंढो": "find_file",
+    "डाउनलोड खोलो": "downloads", "दस्तावेज़ खोलो": "documents", "चमक कम करो": "dim", "चमक तेज करो": "bright",
+    "हिंदी में बात करो": "hindi", "अंग्रेजी में बोलो": "english", "रुको": "stop", "बंद": "exit",
+    "रुको मत गाना चलाओ": "play",
+    "भारत की राजधानी क्या है": None, "कमरे का तापमान": None, "एक चुटकुला सुनाओ": None,
+}
+CORPUS = list(EXPECTED)
+
+
+def legacy_route(command):
+    """Which branch the old handle_command() chain took (None = Cohere)"""
+    if any(word in command for word in ["hindi", "हिंदी"]):
+        return "hindi"
+    if any(word in command for word in ["english", "अंग्रेजी"]):
+        return "english"
+    if "play" in command or "चलाओ" in command:
+        return "play"
+    if "open google" in command or "गूगल" in command:
+        return "google"
+    if "open youtube" in command or "यूट्यूब" in command:
+        return "youtube"
+    if "weather" in command or "मौसम" in command:
+        return "weather"
+    if any(word in command for word in ["exit", "quit", "बंद"]):
+        return "exit"
+    if any(p in command for p in ["current location", "my current location",
+                                  "tell my current location", "वर्तमान स्थान"]):
+        return "location"
+    if any(p in command for p in ["lock windows", "windows lock", "windows band karo",
+                                  "band karo windows", "windows बंद करो", "लॉक विंडोज़",
+                                  "lock my computer", "computer lock", "windows बंद कर दो",
+                                  "लॉक", "lock"]):
+        return "lock"
+    if "dim" in command or "कम" in command:
+        return "dim"
+    if "bright" in command or "तेज" in command:
+        return "bright"
+    if "open downloads" in command or "डाउनलोड" in command:
+        return "downloads"
+    if "open documents" in command or "दस्तावेज़" in command:
+        return "documents"
+    if any(p in command for p in ["find file", "search file", "फाइल ढूंढो", "खोजो फाइल"]):
+        return "find_file"
+    if "stop " in command:
+        return "stop"
+    return None
+
+
+def route(command):
+    match = router.match(command)
+    return match.intent.name if match else None
+
+
+def bench(fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in corpus:
+            fn(command)
+    elapsed = time.perf_counter() - start
+    return len(corpus) * repeat / elapsed, elapsed / (len(corpus) * repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    router.compile()
+    for label, fn in (("if/elif chain", legacy_route), ("intent router", route)):
+        rate, per_command = bench(fn, CORPUS, args.repeat)
+        decisions = collections.Counter(fn(c) is None for c in CORPUS)
+        print(f"{label:<14} {rate:10,.0f} commands/s  {per_command * 1e6:7.2f}us/command  "
+              f"fall through to LLM: {decisions[True]}/{len(CORPUS)}")
+
+    # A chain costs one scan per phrase; the automaton costs one scan per command
+    print("\nScaling with synthetic extra intents:")
+    for extra in (0, 100, 1000):
+        fake = [Intent(f"fake{i}", None, en=[f"zq{i} command", f"do zq{i}"]) for i in range(extra)]
+        grown = IntentRouter(router.intents + fake)
+        phrases = [p for intent in grown.intents for ps in intent.phrases.values() for p in ps]
+        grown.compile()
+        chain_rate, _ = bench(lambda c: any(p in c for p in phrases), CORPUS, max(1, args.repeat // 10))
+        router_rate, _ = bench(grown.match, CORPUS, max(1, args.repeat // 10))
+        print(f"  {len(phrases):5} phrases: chain {chain_rate:10,.0f}/s   router {router_rate:10,.0f}/s")
+
+    wrong = [(c, expected, route(c)) for c, expected in EXPECTED.items() if route(c) != expected]
+    print(f"\nRouting: {len(EXPECTED) - len(wrong)}/{len(EXPECTED)} commands as expected")
+    for command, expected, got in wrong:
+        print(f"  {command!r:<34} expected {str(expected):>10}, got {got}")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
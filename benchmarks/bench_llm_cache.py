@@ -0,0 +1,111 @@
+"""Hit rate and token savings of the LLM response cache on a replayed transcript.
+
+Questions go through the same steps as ask_llm(), in one continuous
+conversation: a cache lookup unless the question is a follow-up
+(llm_cache.is_follow_up), then a prompt built from the bounded history
+and a fake LLM whose cost is the estimated prompt + answer tokens.  The
+transcript marks the real follow-ups; any the detector lets into the
+cache are reported:
+
+    python benchmarks/bench_llm_cache.py --threshold 0.85
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import Conversation, ResponseCache, estimate_tokens, is_follow_up  # noqa: E402
+
+# (language, question, topic, follow-up) - questions sharing a topic have the same answer
+TRANSCRIPT = [
+    ("en", "what's the capital of france", "paris", False),
+    ("en", "capital of france?", "paris", False),
+    ("en", "What is the capital of France", "paris", False),
+    ("en", "and its population?", "france-population", True),
+    ("en", "what is the capital of germany", "berlin", False),
+    ("en", "and its population?", "germany-population", True),
+    ("en", "tell me the capital of germany", "berlin", False),
+    ("en", "how tall is mount everest", "everest", False),
+    ("en", "how tall is everest", "everest", False),
+    ("en", "who is the president of india", "president", False),
+    ("en", "who is the prime minister of india", "pm", False),
+    ("en", "tell me a joke", "joke", False),
+    ("en", "tell me a joke please", "joke", False),
+    ("en", "what is photosynthesis", "photosynthesis", False),
+    ("en", "explain photosynthesis", "photosynthesis", False),
+    ("en", "what's the capital of france", "paris", False),
+    ("en", "what is the weather in paris", "paris-weather", False),
+    ("en", "how far is the moon", "moon", False),
+    ("en", "how far away is the moon from earth", "moon", False),
+    ("hi", "भारत की राजधानी क्या है", "delhi", False),
+    ("hi", "भारत की राजधानी क्या है?", "delhi", False),
+    ("hi", "फ्रांस की राजधानी क्या है", "paris-hi", False),
+    ("en", "what is the capital of france", "paris", False),
+]
+
+
+def fake_llm(prompt, topic):
+    answer = f"Here is a detailed answer about {topic}. " * 4
+    return answer, estimate_tokens(prompt) + estimate_tokens(answer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--budget", type=int, default=400, help="Conversation token budget")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the transcript this many times")
+    args = parser.parse_args()
+
+    cache = ResponseCache(threshold=args.threshold)
+    topics = {}
+    tokens_spent = tokens_uncached = 0
+    wrong = []
+    shared_follow_ups = set()
+    prompt_sizes = []
+    lookup_time = 0.0
+    conversation = Conversation(args.budget)
+    for _ in range(args.repeat):
+        for lang, question, topic, follow_up in TRANSCRIPT:
+            prompt = conversation.prompt(question)
+            prompt_sizes.append(estimate_tokens(prompt))
+            answer, cost = fake_llm(prompt, topic)
+            tokens_uncached += cost
+
+            start = time.perf_counter()
+            shareable = not is_follow_up(question)
+            cached = cache.get(question, lang) if shareable else None
+            lookup_time += time.perf_counter() - start
+            if shareable and follow_up:
+                shared_follow_ups.add(question)
+            if cached is not None:
+                if topics[cached] != topic:
+                    wrong.append((question, topics[cached], topic))
+                conversation.add(question, cached)
+                continue
+            tokens_spent += cost
+            topics[answer] = topic
+            if shareable:
+                cache.put(question, answer, lang, tokens=cost)
+            conversation.add(question, answer)
+
+    lookups = len(TRANSCRIPT) * args.repeat
+    stats = cache.stats
+    print(f"Questions: {lookups}  threshold: {args.threshold}")
+    print(f"Hit rate: {cache.hit_rate():.1%} (exact {stats['exact_hits']}, semantic {stats['semantic_hits']}, "
+          f"misses {stats['misses']})")
+    print(f"Tokens: {tokens_spent} spent vs {tokens_uncached} uncached "
+          f"({1 - tokens_spent / tokens_uncached:.1%} saved)")
+    print(f"Cache lookup: {lookup_time / lookups * 1e6:.0f} us/question")
+    print(f"Prompt size: max {max(prompt_sizes)} tokens (budget {args.budget})")
+    print(f"Follow-ups let into the cache: {len(shared_follow_ups)}")
+    for question in sorted(shared_follow_ups):
+        print(f"  {question!r}")
+    print(f"Wrong answers served: {len(wrong)}")
+    for question, served, expected in wrong:
+        print(f"  {question!r}: got {served}, expected {expected}")
+
+
+if __name__ == "__main__":
+    main()
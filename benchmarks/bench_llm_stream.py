@@ -0,0 +1,105 @@
+"""Time to first audio for blocking vs streamed LLM answers.
+
+A local fake LLM server streams newline-delimited JSON tokens (like
+Cohere's streaming generate) after a first-token delay.  Both modes speak
+through the real SpeechWorker into a NullSink:
+
+    python benchmarks/bench_llm_stream.py --first-token-ms 400 --token-ms 40
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_output import NullSink, SpeechWorker  # noqa: E402
+from llm_stream import stream_sentences  # noqa: E402
+
+ANSWER = ("Paris is the capital of France. It sits on the Seine in the north of the country. "
+          "About two million people live in the city itself. The wider metropolitan area is home "
+          "to more than twelve million. It is known for the Eiffel Tower and the Louvre.")
+
+
+class FakeLLM(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    first_token = 0.4
+    per_token = 0.04
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/stream+json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.first_token)
+        for i, token in enumerate(re.findall(r"\S+\s*", ANSWER)):
+            if i:
+                time.sleep(self.per_token)
+            self.send_chunk({"text": token, "is_finished": False})
+        self.send_chunk({"text": "", "is_finished": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_chunk(self, body):
+        data = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def tokens(url):
+    with requests.post(url, json={"prompt": "capital of france"}, stream=True, timeout=30) as response:
+        for line in response.iter_lines(chunk_size=None):
+            if line:
+                yield json.loads(line)["text"]
+
+
+def run(url, streaming):
+    sink = NullSink(duration=0.0)
+    worker = SpeechWorker(lambda: sink, lambda text, lang: text)
+    start = time.perf_counter()
+    if streaming:
+        for sentence in stream_sentences(tokens(url)):
+            worker.say(sentence, "en")
+    else:
+        worker.say("".join(tokens(url)), "en")
+    generated = time.perf_counter() - start
+    worker.wait()
+    worker.close()
+    return sink.started_at[0] - start, generated, len(sink.played)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    FakeLLM.first_token = args.first_token_ms / 1000
+    FakeLLM.per_token = args.token_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/generate"
+    try:
+        for label, streaming in (("blocking", False), ("streaming", True)):
+            results = [run(url, streaming) for _ in range(args.runs)]
+            first = statistics.mean(r[0] for r in results) * 1000
+            total = statistics.mean(r[1] for r in results) * 1000
+            print(f"{label:<10} time to first audio {first:7.0f} ms   generation {total:7.0f} ms   "
+                  f"utterances {results[0][2]}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
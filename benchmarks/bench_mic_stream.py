@@ -0,0 +1,103 @@
+"""Per-turn capture overhead of the persistent microphone stream.
+
+Synthetic utterances are written to WAV files and replayed in real time
+through WavSource.  "per-turn" opens and calibrates a fresh stream for each
+turn, the way listen() used to with sr.Microphone and
+adjust_for_ambient_noise; "persistent" keeps one calibrated stream open:
+
+    python benchmarks/bench_mic_stream.py --turns 5
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mic_stream import MicStream, WavSource  # noqa: E402
+
+RATE = 16000
+
+
+def write_utterance(path, seconds, rng):
+    """A syllable-like amplitude-modulated tone with quiet noise around it"""
+    samples = array("h")
+    pad = int(0.2 * RATE)
+    total = int(seconds * RATE) + 2 * pad
+    for i in range(total):
+        noise = rng.randint(-60, 60)
+        if pad <= i < total - pad:
+            t = (i - pad) / RATE
+            envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * t)
+            noise += int(6000 * envelope * math.sin(2 * math.pi * 220 * t))
+        samples.append(noise)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+    return total / RATE
+
+
+def turn(stream, source, path):
+    start = time.monotonic()
+    source.feed(path)
+    frames = stream.next_utterance(timeout=10, started_after=start)
+    return time.monotonic() - start, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=1.0, help="Length of each utterance")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jarvis_mic_")
+    try:
+        rng = random.Random(0)
+        paths, durations = [], []
+        for i in range(args.turns):
+            path = os.path.join(workdir, f"utterance_{i}.wav")
+            durations.append(write_utterance(path, args.seconds, rng))
+            paths.append(path)
+
+        per_turn = []
+        for path, duration in zip(paths, durations):
+            start = time.monotonic()
+            source = WavSource(realtime=True)
+            stream = MicStream(source).start()
+            while not stream.calibrated:  # The user waits for calibration to finish
+                time.sleep(0.01)
+            elapsed, frames = turn(stream, source, path)
+            per_turn.append(time.monotonic() - start - duration)
+            stream.close()
+            assert frames, "utterance was not detected"
+
+        source = WavSource(realtime=True)
+        stream = MicStream(source).start()
+        while not stream.calibrated:
+            time.sleep(0.01)
+        persistent = []
+        for path, duration in zip(paths, durations):
+            elapsed, frames = turn(stream, source, path)
+            persistent.append(elapsed - duration)
+            assert frames, "utterance was not detected"
+        stream.close()
+
+        print(f"Turns: {args.turns}, utterance length {durations[0]:.2f}s (endpoint pause included below)")
+        for label, values in (("per-turn open+calibrate", per_turn), ("persistent stream", persistent)):
+            print(f"  {label:<24} capture overhead mean {statistics.mean(values) * 1000:7.0f}ms"
+                  f"   max {max(values) * 1000:7.0f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
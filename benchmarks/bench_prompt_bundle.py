@@ -0,0 +1,114 @@
+"""Cost of the message catalog and time to audio for fixed prompts: synthesized, cached, or from the prompt bundle.
+
+Speech synthesis is served by the local stand-in from fakes.py after
+--tts-ms.  The script reports:
+
+  catalog   loading locales/ and looking messages up, next to the
+            nested-dict lookup it replaced
+  build     app.build_prompt_bundle(): every message without parameters,
+            in every language, packed into one file
+  open      mapping the bundle at startup
+  prompts   app.render_speech() until the first clip is ready, for every
+            fixed prompt, with an empty audio cache (synth), a warm one
+            (cache) and the bundle (bundle)
+
+    python benchmarks/bench_prompt_bundle.py --tts-ms 400
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeServices, install_fake_modules  # noqa: E402
+
+LOOKUPS = 100_000
+
+
+def first_clip(app, text, lang):
+    """Seconds until render_speech() has something to play"""
+    start = time.perf_counter()
+    clips = app.render_speech(text, lang)
+    if isinstance(clips, str) or hasattr(clips, "read"):
+        return time.perf_counter() - start
+    clips = iter(clips)
+    next(clips)
+    elapsed = time.perf_counter() - start
+    for _ in clips:  # Let the rest finish, so it doesn't overlap the next prompt
+        pass
+    return elapsed
+
+
+def bench_catalog(app):
+    from messages import LOCALE_DIR, Catalog
+
+    start = time.perf_counter()
+    Catalog()
+    load = time.perf_counter() - start
+    # Nested dicts, like the LANGUAGES table the catalog replaced
+    nested = {}
+    for lang in app.catalog.languages:
+        with open(os.path.join(LOCALE_DIR, f"{lang}.json"), encoding="utf-8") as fp:
+            nested[lang] = json.load(fp)
+    timings = {
+        "dict": lambda: nested["hi"]["help"],
+        "static": lambda: app.catalog.text("hi", "help"),
+        "template": lambda: app.catalog.text("hi", "brightness_set", level=30),
+    }
+    print(f"catalog: {len(app.catalog.ids)} messages x {len(app.catalog.languages)} languages, "
+          f"loaded in {load * 1000:.2f} ms")
+    for label, lookup in timings.items():
+        start = time.perf_counter()
+        for _ in range(LOOKUPS):
+            lookup()
+        print(f"  {label:<9} {(time.perf_counter() - start) / LOOKUPS * 1e9:6.0f} ns per lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tts-ms", type=float, default=400, help="Synthesis latency per request")
+    args = parser.parse_args()
+
+    services = FakeServices({"tts": args.tts_ms / 1000}).start()
+    install_fake_modules(services.url)
+    workdir = tempfile.mkdtemp(prefix="jarvis_prompts_")
+    os.environ["JARVIS_DATA_DIR"] = workdir
+    try:
+        import app
+        from prompt_bundle import PromptBundle
+        from tts_cache import AudioCache
+
+        bench_catalog(app)
+        prompts = [(lang, text) for lang, _, text in app.catalog.static_messages()]
+
+        path = os.path.join(workdir, "prompts.bundle")
+        calls = services.calls["tts"]
+        start = time.perf_counter()
+        app.build_prompt_bundle(path)
+        print(f"build:   {(time.perf_counter() - start) * 1000:.0f} ms, {services.calls['tts'] - calls} synthesis "
+              f"requests, {os.path.getsize(path) / 1024:.0f} KiB")
+        start = time.perf_counter()
+        bundle = PromptBundle(path)
+        print(f"open:    {(time.perf_counter() - start) * 1000:.2f} ms for {len(bundle)} prompts")
+
+        print(f"prompts: {len(prompts)}")
+        print(f"  {'path':<8} {'mean ms':>8} {'max ms':>8} {'synthesis':>10}")
+        app.tts_cache = AudioCache(os.path.join(workdir, "tts_cache"))
+        app.gtts_voices.clear()  # They hold the previous cache
+        for label in ("synth", "cache", "bundle"):
+            app.prompts = bundle if label == "bundle" else PromptBundle(os.path.join(workdir, "missing"))
+            calls = services.calls["tts"]
+            times = [first_clip(app, text, lang) * 1000 for lang, text in prompts]
+            print(f"  {label:<8} {statistics.mean(times):8.2f} {max(times):8.2f} {services.calls['tts'] - calls:>10}")
+    finally:
+        services.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Scripted conversations against local stand-ins for every external service.
+
+Each scenario is a short conversation (weather flow, file search, YouTube
+play, LLM fallback, language switching).  In text mode many copies of it
+run concurrently through headless.run_session(); with --audio each one is
+also spoken into a fake microphone (mic_stream.WavSource replaying
+generated WAV utterances, or recordings from --wav-dir named
+"<utterance>.wav") and goes through endpointing, speech recognition,
+synthesis and playback.  Every service is served by benchmarks/fakes.py
+with configurable latency (ms) and failure rates:
+
+    python benchmarks/bench_scenarios.py
+    python benchmarks/bench_scenarios.py --audio --scenarios weather,llm
+    python benchmarks/bench_scenarios.py --latency cohere=800 --failure-rate weather=0.2
+    python benchmarks/bench_scenarios.py --save-baseline
+
+Results are compared with benchmarks/scenarios_baseline.json; the exit
+status is 1 when a latency grows or a throughput drops by more than
+--tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import SERVICES, FakeServices, install_fake_modules, parse_overrides, utterance_wav  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios_baseline.json")
+
+# name -> (language, utterances)
+SCENARIOS = {
+    "weather": ("en", ["weather", "another place", "london", "skip", "no"]),
+    "file_search": ("en", ["find file", "budget", "1"]),
+    "youtube": ("en", ["play despacito", "play shape of you"]),
+    "llm": ("en", ["what is the capital of france", "tell me about the eiffel tower",
+                   "what's the capital of france"]),
+    "language": ("en", ["hindi", "गूगल", "भारत की राजधानी क्या है", "english", "open youtube"]),
+}
+FILES = ["budget 2024.xlsx", "budget notes.txt", "holiday photos.jpg", "resume.pdf"]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def load_app(services, data_dir):
+    """Import app.py wired to the stand-ins"""
+    os.environ.update({
+        "JARVIS_DATA_DIR": data_dir,
+        "OPENWEATHER_URL": f"{services.url}/weather",
+        "OPENWEATHER_API_KEY": "offline",
+        "IPINFO_URL": f"{services.url}/ipinfo",
+        "IPINFO_TOKEN": "offline",
+        "COHERE_API_KEY": "offline",
+    })
+    transcripts = install_fake_modules(services.url)
+    import app
+    import tracing
+    from file_index import FileIndex
+
+    files = os.path.join(data_dir, "files")
+    os.makedirs(files)
+    for name in FILES:
+        open(os.path.join(files, name), "w").close()
+    app.file_index = FileIndex([files], os.path.join(data_dir, "file_index.pickle"))
+    app.file_index.refresh()
+    tracing.tracer.configure(trace_path=None, metrics_path=None, export_interval=float("inf"))
+    return app, transcripts
+
+
+def reset(app):
+    """Start each scenario with cold caches"""
+    import tracing
+    from llm_cache import ResponseCache
+
+    app.web.cache.clear()
+    app.videos.clear()
+    app.llm_cache = ResponseCache(threshold=app.LLM_CACHE_THRESHOLD, ttl=app.LLM_CACHE_TTL)
+    if os.path.exists(app.locator.path):
+        os.remove(app.locator.path)
+    tracing.tracer.histograms.clear()
+
+
+def stage_summary():
+    """{stage: p50 ms} over every intent"""
+    import tracing
+    merged = {}
+    for (intent, stage), histogram in tracing.tracer.histograms.items():
+        merged.setdefault(stage, []).extend(histogram.samples)
+    return {stage: percentile(samples, 50) * 1000 for stage, samples in sorted(merged.items())}
+
+
+def run_text(app, name, sessions, workers):
+    from headless import run_session
+
+    lang, turns = SCENARIOS[name]
+    reset(app)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda i: run_session(turns, f"{name}#{i}", lang), range(sessions)))
+    wall = time.perf_counter() - start
+    latencies = [ms for r in results for ms in r["latency_ms"]]
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "sessions_per_s": sessions / wall,
+        "turns_per_s": len(latencies) / wall,
+    }, stage_summary()
+
+
+def run_audio(app, transcripts, name, wav_dir, speech_ms, workdir, verbose=False):
+    """One conversation through the fake microphone.
+
+    A turn's latency is its time not spent on the user's own speech:
+    endpointing, recognition and handling, including any follow-up
+    questions the handler asks.
+    """
+    import tracing
+    from audio_output import NullSink, SpeechWorker
+    from mic_stream import MicStream, WavSource
+    from session import ConversationEnded, Session, using
+
+    lang, turns = SCENARIOS[name]
+    reset(app)
+    trace_path = os.path.join(workdir, f"{name}.jsonl")
+    tracing.tracer.configure(trace_path=trace_path)
+
+    source = WavSource(realtime=True, chunk=512)
+    stream = MicStream(source, calibration_seconds=0.2, pause_seconds=0.3).start()
+    while not stream.calibrated:
+        time.sleep(0.01)
+    speech = SpeechWorker(lambda: NullSink(speech_ms / 1000), app.render_speech)
+    script = iter(turns)
+    capture = app._capture
+
+    def scripted_capture(started_after, timeout=10, barge_in=False):
+        if not barge_in:  # A real listen, not a stop check while speaking
+            text = next(script, None)
+            if text is None:
+                raise ConversationEnded
+            path = os.path.join(wav_dir or "", f"{text}.wav")
+            if not wav_dir or not os.path.exists(path):
+                path = utterance_wav(os.path.join(workdir, f"utterance{abs(hash(text))}.wav"), text)
+            transcripts.push(text)
+            source.feed(path)
+        return capture(started_after, timeout, barge_in)
+
+    saved = app.mic_stream, app.speech, app._capture
+    app.mic_stream, app.speech, app._capture = stream, speech, scripted_capture
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as quiet:
+            if not verbose:  # app.py narrates every turn on stdout
+                quiet.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            quiet.enter_context(using(Session(lang=lang, act=lambda action, target: None, session_id=name)))
+            while True:
+                app.say("help")
+                app.take_turn()
+    except (ConversationEnded, SystemExit):
+        pass
+    finally:
+        speech.wait(timeout=10)
+        wall = time.perf_counter() - start
+        app.mic_stream, app.speech, app._capture = saved
+        speech.close()
+        stream.close()
+        tracing.tracer.close()
+        tracing.tracer.configure(trace_path=None)
+
+    system = {}
+    with open(trace_path, encoding="utf-8") as fp:
+        for row in map(json.loads, fp):
+            if row["stage"] in ("turn", "capture"):
+                sign = 1 if row["stage"] == "turn" else -1
+                system[row["turn"]] = system.get(row["turn"], 0.0) + sign * row["ms"]
+    latencies = list(system.values())
+    return {
+        "system_p50_ms": percentile(latencies, 50),
+        "system_p95_ms": percentile(latencies, 95),
+        "turns_per_s": len(latencies) / wall,
+    }, stage_summary()
+
+
+def compare(results, baseline, tolerance, slack_ms=5.0):
+    """Print each metric next to its baseline; return the regressions"""
+    regressions = []
+    print(f"\n{'metric':<36} {'baseline':>10} {'now':>10} {'change':>8}")
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(key, {}).get(metric)
+            if base is None:
+                continue
+            change = (value - base) / base if base else 0.0
+            if metric.endswith("_ms"):
+                worse = value > base * (1 + tolerance) + slack_ms
+            else:
+                worse = value < base * (1 - tolerance)
+            flag = "  REGRESSION" if worse else ""
+            print(f"{key + ' ' + metric:<36} {base:10.2f} {value:10.2f} {change:+8.1%}{flag}")
+            if worse:
+                regressions.append((key, metric))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset")
+    parser.add_argument("--sessions", type=int, default=20, help="Copies of each text scenario")
+    parser.add_argument("--workers", type=int, default=8, help="Text sessions running at once")
+    parser.add_argument("--audio", action="store_true", help="Also run each scenario through the fake microphone")
+    parser.add_argument("--wav-dir", help="Recorded utterances, named '<utterance>.wav' (16 kHz mono 16-bit)")
+    parser.add_argument("--speech-ms", type=float, default=0, help="How long each spoken reply 'plays'")
+    parser.add_argument("--latency", help="Service latency overrides in ms, e.g. weather=120,cohere=400")
+    parser.add_argument("--failure-rate", help="Injected failure rates, e.g. weather=0.1,asr=0.05")
+    parser.add_argument("--verbose", action="store_true", help="Show what app.py prints in audio mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change")
+    args = parser.parse_args()
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    latency = {k: v / 1000 for k, v in parse_overrides(args.latency).items()}
+    services = FakeServices(latency, parse_overrides(args.failure_rate), args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="jarvis_scenarios_")
+    results = {}
+    try:
+        app, transcripts = load_app(services, workdir)
+        print(f"{'scenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'turns/s':>8}   stage p50 ms")
+        for name in names:
+            metrics, stages = run_text(app, name, args.sessions, args.workers)
+            results[f"text:{name}"] = metrics
+            print(f"{'text:' + name:<22} {metrics['p50_ms']:8.1f} {metrics['p95_ms']:8.1f} "
+                  f"{metrics['p99_ms']:8.1f} {metrics['turns_per_s']:8.1f}   " + _stages(stages))
+        if args.audio:
+            for name in names:
+                metrics, stages = run_audio(app, transcripts, name, args.wav_dir, args.speech_ms, workdir,
+                                           args.verbose)
+                results[f"audio:{name}"] = metrics
+                print(f"{'audio:' + name:<22} {metrics['system_p50_ms']:8.1f} "
+                      f"{metrics['system_p95_ms']:8.1f} {'':>8} {metrics['turns_per_s']:8.1f}   "
+                      + _stages(stages))
+    finally:
+        services.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nService calls: " + ", ".join(f"{s} {services.calls[s]}" + (f" ({services.failures[s]} failed)"
+                                                                          if services.failures[s] else "")
+                                         for s in SERVICES if services.calls[s]))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fp:
+            baseline = json.load(fp)
+    if args.save_baseline:
+        baseline.update({k: {m: round(v, 3) for m, v in metrics.items()} for k, metrics in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not baseline:
+        print("No baseline yet; run with --save-baseline to create one")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+def _stages(stages):
+    shown = [s for s in stages if s != "turn"]
+    return " ".join(f"{s}={stages[s]:.0f}" for s in shown)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Load test for server.py: many concurrent clients running the scripted scenarios.
+
+Starts the server in-process against the stand-ins from fakes.py, then
+--clients clients at a time each open a session, play one scenario from
+bench_scenarios.py turn by turn (answers to follow-up questions included)
+and close it, until --sessions sessions have run:
+
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --clients 200 --sessions 2000 --workers 64
+    python benchmarks/bench_server.py --websocket --audio --latency cohere=800
+    python benchmarks/bench_server.py --workers 4 --think-ms 2000
+
+--think-ms has clients pause before answering a follow-up question, like
+a user thinking it over; flows waiting on them shouldn't hold up the
+turns of other sessions.
+
+Reports sessions/s, turns/s and turn latency percentiles; turns the server
+turns away when its backlog is full are retried and counted.  Each session is
+also checked against a run of the same scenario on its own: the same
+follow-up questions at the same turns and the same final language, which
+would break if sessions leaked state into each other.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scenarios import SCENARIOS, load_app, percentile  # noqa: E402
+from fakes import FakeServices, parse_overrides, utterance_wav  # noqa: E402
+
+RETRY_SECONDS = 0.05  # Wait before resending a turn the server turned away (503)
+
+
+class HttpClient:
+    """One keep-alive connection speaking the server's JSON API"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, content_type="application/json"):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        data = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n"
+                           f"Content-Length: {len(data)}\r\n\r\n").encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = json.loads(await self.reader.readexactly(int(headers["content-length"])))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class HttpSession:
+    def __init__(self, port):
+        self.client = HttpClient(port)
+        self.id = None
+        self.rejected = 0
+
+    async def open(self, lang):
+        status, created = await self.client.request("POST", "/sessions", {"lang": lang})
+        if status != 201:
+            raise RuntimeError(f"open: HTTP {status} {created}")
+        self.id = created["id"]
+
+    async def turn(self, text, audio=None):
+        while True:
+            if audio is not None:
+                status, reply = await self.client.request("POST", f"/sessions/{self.id}/turns", audio, "audio/wav")
+            else:
+                status, reply = await self.client.request("POST", f"/sessions/{self.id}/turns", {"text": text})
+            if status != 503:
+                break
+            self.rejected += 1
+            await asyncio.sleep(RETRY_SECONDS)
+        if status != 200:
+            raise RuntimeError(f"turn: HTTP {status} {reply}")
+        return reply
+
+    async def close(self):
+        try:
+            await self.client.request("DELETE", f"/sessions/{self.id}")
+        finally:
+            await self.client.close()
+
+
+class WebSocketSession:
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+        self.rejected = 0
+
+    async def open(self, lang):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /ws?lang={lang} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        status = int((await self.reader.readline()).split()[1])
+        while (await self.reader.readline()) not in (b"\r\n", b""):
+            pass
+        if status != 101:
+            raise RuntimeError(f"open: HTTP {status}")
+        await self._receive()  # The greeting
+
+    async def turn(self, text, audio=None):
+        while True:
+            if audio is not None:
+                self._send(0x2, audio)
+            else:
+                self._send(0x1, text.encode("utf-8"))
+            await self.writer.drain()
+            reply = await self._receive()
+            if reply.get("status") != 503:
+                break
+            self.rejected += 1
+            await asyncio.sleep(RETRY_SECONDS)
+        if "error" in reply:
+            raise RuntimeError(f"turn: {reply}")
+        return reply
+
+    async def close(self):
+        try:
+            self._send(0x8, struct.pack("!H", 1000))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+    def _send(self, opcode, data):
+        mask = os.urandom(4)
+        length = len(data)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        key = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        self.writer.write(header + mask + masked)
+
+    async def _receive(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+        return json.loads(await self.reader.readexactly(length))
+
+
+async def run_session(connect, name, recordings, stats, think=0.0):
+    """Play one scenario; returns its signature (follow-up questions per turn, final language)"""
+    lang, turns = SCENARIOS[name]
+    session = connect()
+    start = time.perf_counter()
+    await session.open(lang)
+    signature = []
+    try:
+        for text in turns:
+            if think and signature and signature[-1]:  # Answering a question
+                await asyncio.sleep(think)
+            sent = time.perf_counter()
+            reply = await session.turn(text, recordings.get(text))
+            stats["turn_ms"].append((time.perf_counter() - sent) * 1000)
+            signature.append(reply["awaiting"])
+            if reply["ended"]:
+                break
+        signature.append(reply["lang"])
+    finally:
+        stats["rejected"] += session.rejected
+        await session.close()
+    stats["session_ms"].append((time.perf_counter() - start) * 1000)
+    return signature
+
+
+async def load(args, port, names, recordings):
+    def connect():
+        return WebSocketSession(port) if args.websocket else HttpSession(port)
+
+    # What each scenario looks like without any other session around
+    expected = {}
+    for name in names:
+        expected[name] = await run_session(connect, name, recordings,
+                                           {"turn_ms": [], "session_ms": [], "rejected": 0})
+
+    stats = {"turn_ms": [], "session_ms": [], "rejected": 0, "errors": 0, "mismatches": 0}
+    slots = asyncio.Semaphore(args.clients)
+
+    async def client(i):
+        name = names[i % len(names)]
+        async with slots:
+            try:
+                if await run_session(connect, name, recordings, stats, args.think_ms / 1000) != expected[name]:
+                    stats["mismatches"] += 1
+            except (RuntimeError, ConnectionError, asyncio.IncompleteReadError) as e:
+                stats["errors"] += 1
+                if stats["errors"] <= 3:
+                    print(f"Session error: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(args.sessions)))
+    stats["wall"] = time.perf_counter() - start
+    return stats
+
+
+def record_utterances(names, transcripts, workdir):
+    """A WAV per utterance, registered with the fake recognizer so concurrent sessions hear the right text"""
+    recordings = {}
+    for name in names:
+        for text in SCENARIOS[name][1]:
+            path = utterance_wav(os.path.join(workdir, f"utterance{len(recordings)}.wav"), text)
+            with open(path, "rb") as fp:
+                recordings[text] = fp.read()
+            with wave.open(path) as wav:
+                transcripts.register(wav.readframes(wav.getnframes()), text)
+    return recordings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset")
+    parser.add_argument("--sessions", type=int, default=500, help="Sessions to run in total")
+    parser.add_argument("--clients", type=int, default=100, help="Clients connected at once")
+    parser.add_argument("--workers", type=int, default=32, help="Server turn workers")
+    parser.add_argument("--asr-workers", type=int, default=4, help="Server speech recognition workers")
+    parser.add_argument("--websocket", action="store_true", help="Use /ws instead of the HTTP API")
+    parser.add_argument("--audio", action="store_true", help="Send WAV recordings instead of text")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause before answering a follow-up question")
+    parser.add_argument("--latency", help="Service latency overrides in ms, e.g. weather=120,cohere=400")
+    parser.add_argument("--failure-rate", help="Injected failure rates, e.g. weather=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    latency = {k: v / 1000 for k, v in parse_overrides(args.latency).items()}
+    services = FakeServices(latency, parse_overrides(args.failure_rate), args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="jarvis_server_")
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="server", daemon=True).start()
+    try:
+        app, transcripts = load_app(services, workdir)
+        import server
+        recordings = record_utterances(names, transcripts, workdir) if args.audio else {}
+        jarvis = asyncio.run_coroutine_threadsafe(
+            server.Server(workers=args.workers, asr_workers=args.asr_workers, max_sessions=args.clients + 10,
+                          allow_files=True).start("127.0.0.1", 0), loop).result()  # Files: load_app()'s temp dir
+        stats = asyncio.run(load(args, jarvis.port, names, recordings))
+        asyncio.run_coroutine_threadsafe(jarvis.close(), loop).result()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        services.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    turns = stats["turn_ms"]
+    mode = ("websocket" if args.websocket else "http") + (" audio" if args.audio else " text")
+    think = f", {args.think_ms:.0f} ms to answer" if args.think_ms else ""
+    print(f"{args.sessions} sessions ({mode}), {args.clients} clients, {args.workers} workers{think}: "
+          f"{stats['wall']:.2f}s")
+    print(f"  {args.sessions / stats['wall']:.1f} sessions/s  {len(turns) / stats['wall']:.1f} turns/s")
+    if turns:
+        print(f"  turn latency ms  mean {statistics.mean(turns):.1f}  p50 {percentile(turns, 50):.1f}  "
+              f"p95 {percentile(turns, 95):.1f}  p99 {percentile(turns, 99):.1f}  max {max(turns):.1f}")
+    print(f"  turns turned away (503, retried) {stats['rejected']}  errors {stats['errors']}  "
+          f"sessions differing from a solo run {stats['mismatches']}")
+    if stats["errors"] or stats["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Cold-start time of `import app` with every external module stubbed.
+
+Each run is a fresh interpreter.  Stub modules stand in for the third-party
+packages and sleep --import-ms when imported, so an integration that is
+imported eagerly again shows up both in the time and in the list of
+modules loaded at import:
+
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 400
+
+Exits with status 1 when the median exceeds --budget-ms or a lazily
+loaded integration was imported eagerly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Needed to import app.py at all
+EAGER = ["dotenv", "requests", "requests.adapters"]
+# Must only be imported on first use
+LAZY = ["speech_recognition", "pyttsx3", "geocoder", "cohere", "googletrans", "gtts",
+        "pygame", "youtube_search", "numpy", "screen_brightness_control"]
+
+STUB = '''import time
+from unittest import mock
+
+time.sleep({cost})
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return mock.MagicMock(name=__name__ + "." + name)
+'''
+
+PROBE = '''import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+'''
+
+
+def write_stubs(directory, cost):
+    for name in EAGER + LAZY:
+        parts = name.split(".")
+        if len(parts) > 1:
+            path = os.path.join(directory, *parts) + ".py"
+        else:
+            path = os.path.join(directory, name, "__init__.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(STUB.format(cost=cost))
+
+
+def cold_start(stubs, data_dir):
+    env = dict(os.environ, PYTHONPATH=stubs, JARVIS_DATA_DIR=data_dir, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.run([sys.executable, "-c", PROBE % (LAZY,)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-ms", type=float, default=50, help="Simulated import cost of each stub")
+    parser.add_argument("--budget-ms", type=float, default=400, help="Fail when the median is slower")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as stubs, tempfile.TemporaryDirectory() as data_dir:
+        write_stubs(stubs, args.import_ms / 1000)
+        results = [cold_start(stubs, data_dir) for _ in range(args.runs)]
+
+    times = sorted(r["seconds"] * 1000 for r in results)
+    median = statistics.median(times)
+    eager = sorted(set().union(*(r["loaded"] for r in results)))
+    print(f"import app: median {median:.1f} ms  min {times[0]:.1f} ms  max {times[-1]:.1f} ms  "
+          f"({args.runs} runs, {args.import_ms:.0f} ms per stubbed import)")
+    print(f"Integrations imported eagerly: {', '.join(eager) or 'none'}")
+    if median > args.budget_ms or eager:
+        print(f"REGRESSION (budget {args.budget_ms:.0f} ms, no eager integrations)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of a traced stage with tracing on, off, and outside a turn.
+
+    python benchmarks/bench_tracing.py --turns 20000 --stages 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracing import Tracer  # noqa: E402
+
+
+def run(tracer, turns, stages, in_turn=True):
+    start = time.perf_counter()
+    for _ in range(turns):
+        if in_turn:
+            with tracer.turn("bench"):
+                tracer.set_intent("bench")
+                for _ in range(stages):
+                    with tracer.stage("stage"):
+                        pass
+        else:
+            for _ in range(stages):
+                with tracer.stage("stage"):
+                    pass
+    return (time.perf_counter() - start) / (turns * stages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--stages", type=int, default=8, help="Stages per turn")
+    parser.add_argument("--trace", help="Also write a JSONL trace log here")
+    args = parser.parse_args()
+
+    on = Tracer(trace_path=args.trace, export_interval=float("inf"))
+    cases = [
+        ("tracing on", on, True),
+        ("tracing off (JARVIS_TRACE=0)", Tracer(enabled=False), True),
+        ("outside a turn", on, False),
+    ]
+    for label, tracer, in_turn in cases:
+        per_stage = run(tracer, args.turns, args.stages, in_turn)
+        print(f"{label:<30} {per_stage * 1e6:7.2f} us/stage")
+    on.close()
+    intent, stage, count, p50, p95, p99 = on.summary()[-1]
+    print(f"Recorded {count} '{stage}' samples for intent '{intent}' "
+          f"(window of {on.window}; p50 {p50 * 1e6:.1f} us, p99 {p99 * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
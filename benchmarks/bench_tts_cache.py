@@ -0,0 +1,88 @@
+"""Replay a typical session through the TTS audio cache with a stub synthesizer.
+
+The stub sleeps for a length-dependent "synthesis" time, so the numbers show
+what a cache hit saves compared with rendering every utterance:
+
+    python benchmarks/bench_tts_cache.py --turns 200 --synth-ms 400
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_cache import AudioCache  # noqa: E402
+
+FIXED = ["How may I help?", "Let me think about that", "Goodbye!", "Playing on YouTube",
+         "Current location or another place?", "City name?", "Check another? (yes/no)",
+         "मैं कैसे मदद करूं?", "मुझे इसके बारे में सोचने दो"]
+
+
+def stub_synthesizer(base_ms, per_char_ms):
+    def synthesize(text, path):
+        time.sleep((base_ms + per_char_ms * len(text)) / 1000)
+        with open(path, "wb") as fp:
+            fp.write(text.encode("utf-8") * 200)  # Roughly audio-sized payload
+    return synthesize
+
+
+def session(turns, rng):
+    """Every turn opens with the help prompt; a third of replies are one-off answers"""
+    for turn in range(turns):
+        yield "How may I help?"
+        if rng.random() < 0.33:
+            yield f"Answer number {turn} from the language model"
+        else:
+            yield rng.choice(FIXED)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--synth-ms", type=float, default=400, help="Fixed synthesis cost per utterance")
+    parser.add_argument("--per-char-ms", type=float, default=5)
+    parser.add_argument("--max-kb", type=int, default=50_000, help="Cache size budget")
+    parser.add_argument("--prerender", action="store_true", help="Render the fixed phrases first")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="jarvis_tts_")
+    try:
+        cache = AudioCache(directory, max_bytes=args.max_kb * 1024)
+        synthesize = stub_synthesizer(args.synth_ms, args.per_char_ms)
+        if args.prerender:
+            start = time.perf_counter()
+            for text in FIXED:
+                cache.render("en", "stub", 160, text, synthesize)
+            print(f"Prerendered {len(FIXED)} phrases in {time.perf_counter() - start:.2f}s")
+            cache.hits = cache.misses = 0
+
+        uncached, cached = [], []
+        for text in session(args.turns, random.Random(0)):
+            uncached.append((args.synth_ms + args.per_char_ms * len(text)) / 1000)
+            start = time.perf_counter()
+            cache.render("en", "stub", 160, text, synthesize)
+            cached.append(time.perf_counter() - start)
+
+        print(f"Utterances:       {len(cached)}")
+        print(f"Hit rate:         {cache.hit_rate():.1%} ({cache.hits} hits, {cache.misses} misses)")
+        print(f"Cache size:       {cache.total_bytes / 1024:.0f} KiB in {len(cache.entries)} files")
+        print("Time to audio     mean       p50       p95")
+        for label, values in (("no cache", uncached), ("cache", cached)):
+            print(f"  {label:<12} {statistics.mean(values) * 1000:7.1f}ms "
+                  f"{percentile(values, 50) * 1000:7.1f}ms {percentile(values, 95) * 1000:7.1f}ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Time to first audio and total time for Hindi speech: whole-file vs streamed synthesis.
+
+The synthesizer is a stand-in for gTTS: like the real one it sends text in
+pieces of at most 100 characters, one request after another, each taking
+--request-ms plus --char-ms per character.  Its "audio" plays for
+--speech-char-ms per character.  Both paths speak through the real
+SpeechWorker into a sink that plays for the clip's duration:
+
+  file      the whole utterance is synthesized into an mp3 file (a
+            tts_cache miss), which then plays
+  streamed  tts_stream.StreamingSynthesizer: sentence chunks synthesized
+            concurrently into memory, the first playing while the rest
+            are produced
+
+    python benchmarks/bench_tts_stream.py --request-ms 250 --workers 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_output import NullSink, SpeechWorker  # noqa: E402
+from tts_cache import AudioCache  # noqa: E402
+from tts_stream import StreamingSynthesizer, split_chunks  # noqa: E402
+
+TEXTS = {
+    "prompt": "मैं कैसे मदद करूं?",
+    "answer": "भारत की राजधानी नई दिल्ली है। यह देश का राजनीतिक और प्रशासनिक केंद्र है।",
+    "long answer": ("भारत की राजधानी नई दिल्ली है। यह यमुना नदी के किनारे बसी है और देश का "
+                    "राजनीतिक केंद्र है। यहाँ संसद भवन, राष्ट्रपति भवन और सर्वोच्च न्यायालय स्थित हैं। "
+                    "लाल किला, कुतुब मीनार और इंडिया गेट यहाँ के प्रसिद्ध स्थल हैं। "
+                    "दिल्ली की आबादी दो करोड़ से अधिक है और यह भारत के सबसे बड़े शहरों में से एक है।"),
+}
+BYTES_PER_CHAR = 100  # Size of the stand-in audio
+
+
+class StubTTS:
+    """gTTS stand-in: sequential requests of up to 100 characters"""
+
+    def __init__(self, request_ms, char_ms):
+        self.request = request_ms / 1000
+        self.per_char = char_ms / 1000
+
+    def write_to_fp(self, text, fp):
+        for part in split_chunks(text, max_chars=100, min_chars=100):
+            time.sleep(self.request + self.per_char * len(part))
+            fp.write(b"\0" * (len(part) * BYTES_PER_CHAR))
+
+    def save(self, text, path):
+        with open(path, "wb") as fp:
+            self.write_to_fp(text, fp)
+
+
+class ClipSink(NullSink):
+    """Each clip plays for as long as its text takes to say"""
+
+    def __init__(self, speech_char_ms):
+        super().__init__()
+        self.per_byte = speech_char_ms / 1000 / BYTES_PER_CHAR
+
+    def play(self, clip):
+        super().play(clip)
+        size = len(clip.getvalue()) if hasattr(clip, "getvalue") else os.path.getsize(clip)
+        self._until = time.monotonic() + size * self.per_byte
+
+
+def run(text, streamed, tts, args):
+    directory = tempfile.mkdtemp(prefix="jarvis_tts_")
+    cache = AudioCache(directory)  # Empty: every utterance is a cache miss
+    if streamed:
+        synthesizer = StreamingSynthesizer(tts.write_to_fp, workers=args.workers, cache=cache)
+        render = lambda text, lang: synthesizer.render(text)  # noqa: E731
+    else:
+        render = lambda text, lang: cache.render("hi", "gtts", 0, text, tts.save, ".mp3")  # noqa: E731
+    sink = ClipSink(args.speech_char_ms)
+    worker = SpeechWorker(lambda: sink, render, poll_interval=0.001)
+    try:
+        start = time.perf_counter()
+        worker.say(text, "hi")
+        worker.wait()
+        total = time.perf_counter() - start
+    finally:
+        worker.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return sink.started_at[0] - start, total, len(sink.played)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--request-ms", type=float, default=250, help="Per synthesis request")
+    parser.add_argument("--char-ms", type=float, default=1, help="Synthesis time per character")
+    parser.add_argument("--speech-char-ms", type=float, default=60, help="Playback time per character")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks synthesized at once")
+    args = parser.parse_args()
+
+    tts = StubTTS(args.request_ms, args.char_ms)
+    print(f"{'text':<12} {'chars':>5} {'path':<9} {'first audio ms':>15} {'total ms':>9} {'clips':>6}")
+    for name, text in TEXTS.items():
+        for label, streamed in (("file", False), ("streamed", True)):
+            results = [run(text, streamed, tts, args) for _ in range(args.runs)]
+            first = statistics.mean(r[0] for r in results) * 1000
+            total = statistics.mean(r[1] for r in results) * 1000
+            print(f"{name:<12} {len(text):>5} {label:<9} {first:15.0f} {total:9.0f} {results[0][2]:>6}")
+
+
+if __name__ == "__main__":
+    main()
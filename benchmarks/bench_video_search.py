@@ -0,0 +1,100 @@
+"""Latency of "play ..." requests with repeated and reworded queries, before and after the search cache.
+
+A spoken session asks for a handful of songs several times, in slightly
+different words ("play despacito", "play the despacito song").  The YouTube
+search is served by the local stand-in from fakes.py after --search-ms.
+For each request the script measures, from the command:
+
+  feedback  until "Playing on YouTube" is said
+  opened    until the video URL is opened
+
+  old        the previous play_youtube_video(): a max_results=1 search for
+             every request, then the prompt
+  cached     app.play_youtube_video() with a cold cache: the search starts
+             while the prompt is said, results are cached by normalized query
+  restarted  the same, with the cache file left by the previous run
+
+    python benchmarks/bench_video_search.py --search-ms 1200
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeServices, install_fake_modules  # noqa: E402
+
+REQUESTS = [
+    "play despacito", "play shape of you", "play the despacito song", "play believer",
+    "play shape of you video", "play despacito on youtube", "play believer please", "play shape of you",
+    "play despacito", "play perfect", "play the believer song", "play perfect",
+]
+
+
+def old_play(app, query):
+    """play_youtube_video() before the cache: one blocking search per request"""
+    results = app.youtube_search.YoutubeSearch(query, max_results=1).to_dict()
+    if results:
+        app.say("playing")
+        app.perform("open_url", f"https://youtube.com{results[0]['url_suffix']}")
+
+
+def run(app, play):
+    from headless import ScriptedSession
+    from session import using
+
+    feedback, opened = [], []
+    for command in REQUESTS:
+        session = ScriptedSession([])
+        with using(session):
+            start = time.perf_counter()
+            play(command)
+        times = {}
+        for event in session.events:
+            times.setdefault(event["kind"], event["t"] - start)
+        feedback.append(times["jarvis"] * 1000)
+        opened.append(times["action"] * 1000)
+    return feedback, opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--search-ms", type=float, default=1200, help="YouTube search (scrape) latency")
+    args = parser.parse_args()
+
+    services = FakeServices({"youtube": args.search_ms / 1000}).start()
+    install_fake_modules(services.url)
+    workdir = tempfile.mkdtemp(prefix="jarvis_youtube_")
+    os.environ["JARVIS_DATA_DIR"] = workdir
+    try:
+        import app
+        from video_search import VideoSearch
+
+        path = os.path.join(workdir, "youtube_cache.json")
+        backend = app.videos._search
+
+        def new_play(command):
+            app.play_command(command, app.router.match(command))
+
+        print(f"{len(REQUESTS)} requests, {len(set(REQUESTS))} distinct wordings")
+        print(f"{'':<10} {'feedback ms':>12} {'opened ms':>10} {'p50 opened':>11} {'searches':>9}")
+        for label in ("old", "cached", "restarted"):
+            calls = services.calls["youtube"]
+            if label == "old":
+                feedback, opened = run(app, lambda command: old_play(app, command[len("play "):]))
+            else:
+                app.videos = VideoSearch(backend, path)  # "restarted" reloads what "cached" saved
+                feedback, opened = run(app, new_play)
+            print(f"{label:<10} {statistics.mean(feedback):12.0f} {statistics.mean(opened):10.0f} "
+                  f"{statistics.median(opened):11.0f} {services.calls['youtube'] - calls:>9}")
+    finally:
+        services.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
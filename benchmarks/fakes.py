@@ -0,0 +1,342 @@
+"""Local stand-ins for every service JARVIS talks to, for offline benchmarks.
+
+FakeServices is one HTTP server playing OpenWeather, ipinfo.io, geocoder,
+Cohere (plain and streamed generate), YouTube search, Google speech
+recognition and the TTS engines, each with its own injected latency and
+failure rate.  install_fake_modules() puts thin clients for it in place of
+the third-party packages that would otherwise reach the real services or
+devices; it must run before `import app`.  utterance_wav() writes the
+noise-burst WAVs that mic_stream.WavSource replays as a fake microphone.
+"""
+import collections
+import hashlib
+import io
+import json
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import types
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+# Seconds before each service answers; "cohere_token" is the gap between streamed tokens
+DEFAULT_LATENCY = {
+    "weather": 0.08, "ipinfo": 0.05, "geocoder": 0.1, "cohere": 0.3, "cohere_token": 0.02,
+    "youtube": 0.2, "asr": 0.25, "tts": 0.15,
+}
+SERVICES = ("weather", "ipinfo", "geocoder", "cohere", "youtube", "asr", "tts")
+
+
+def parse_overrides(text, cast=float):
+    """"weather=120,cohere=400" -> {"weather": 120.0, "cohere": 400.0}"""
+    overrides = {}
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.partition("=")
+        overrides[name.strip()] = cast(value)
+    return overrides
+
+
+class FakeServices:
+    """Runs the stand-in server on a free local port"""
+
+    def __init__(self, latency=None, failure_rate=None, seed=0):
+        handler = type("Handler", (_Handler,), {
+            "latency": {**DEFAULT_LATENCY, **(latency or {})},
+            "failure_rate": dict(failure_rate or {}),
+            "rng": random.Random(seed),
+            "calls": collections.Counter(),
+            "failures": collections.Counter(),
+            "lock": threading.Lock(),
+        })
+        self.handler = handler
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def calls(self):
+        return self.handler.calls
+
+    @property
+    def failures(self):
+        return self.handler.failures
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-services", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        service = url.path.strip("/")
+        if not self._enter(service):
+            return
+        if service == "weather":
+            city, _, country = query.get("q", "Delhi").partition(",")
+            self._json({"cod": 200, "name": city.title(), "sys": {"country": (country or "IN")[:2].upper()},
+                        "main": {"temp": 21.5}, "weather": [{"description": "clear sky"}]})
+        elif service in ("ipinfo", "geocoder"):
+            self._json({"city": "New Delhi", "country": "IN"})
+        elif service == "youtube":
+            q = query.get("q", "")
+            self._json({"videos": [{"title": f"{q} ({i})", "url_suffix": f"/watch?v={abs(hash((q, i))) % 10**8}"}
+                                   for i in range(int(query.get("max_results", 1)))]})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        service = urlsplit(self.path).path.strip("/")
+        if not self._enter(service):
+            return
+        if service == "asr":
+            self._json({"bytes": len(body)})
+        elif service == "tts":
+            self._send(200, "audio/wav", silent_wav(0.2))
+        elif service == "cohere":
+            request = json.loads(body)
+            answer = fake_answer(request["prompt"])
+            if not request.get("stream"):
+                self._json({"generations": [{"text": answer}]})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/stream+json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, token in enumerate(re.findall(r"\S+\s*", answer)):
+                if i:
+                    time.sleep(self.latency["cohere_token"])
+                self._chunk({"text": token, "is_finished": False})
+            self._chunk({"text": "", "is_finished": True})
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def _enter(self, service):
+        """Count the call, wait out the latency and maybe fail it"""
+        with self.lock:
+            self.calls[service] += 1
+            failed = self.rng.random() < self.failure_rate.get(service, 0.0)
+            if failed:
+                self.failures[service] += 1
+        time.sleep(self.latency.get(service, 0.0))
+        if failed:
+            if service == "weather":
+                self._json({"cod": 503, "message": "injected failure"}, 503)
+            else:
+                self._json({"error": "injected failure"}, 503)
+        return not failed
+
+    def _json(self, body, status=200):
+        self._send(status, "application/json", json.dumps(body).encode())
+
+    def _send(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, body):
+        data = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_answer(prompt):
+    question = prompt.rstrip().rsplit("User:", 1)[-1].replace("Jarvis:", "").strip()
+    return (f"Here is what I know about {question}. It is a good question to ask. "
+            f"I hope this short answer helps.")
+
+
+def silent_wav(seconds, sample_rate=16000):
+    return _wav(b"\0\0" * int(seconds * sample_rate), sample_rate)
+
+
+def utterance_wav(path, text, sample_rate=16000, seed=None):
+    """A burst of noise about as long as saying `text`, with silence around it"""
+    rng = random.Random(text if seed is None else seed)
+    seconds = min(2.0, 0.4 + 0.04 * len(text))
+    voiced = struct.pack(f"<{int(seconds * sample_rate)}h",
+                         *(rng.randint(-8000, 8000) for _ in range(int(seconds * sample_rate))))
+    pad = b"\0\0" * int(0.1 * sample_rate)
+    with open(path, "wb") as fp:
+        fp.write(_wav(pad + voiced + pad, sample_rate))
+    return path
+
+
+def _wav(frames, sample_rate):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+class Transcripts:
+    """What the fake recognizer "hears".
+
+    Either the scripted text of each utterance, in order, or - when many
+    clients talk at once - the text registered for those exact audio frames.
+    """
+
+    def __init__(self):
+        self._queue = collections.deque()
+        self._by_audio = {}
+
+    def push(self, text):
+        self._queue.append(text)
+
+    def register(self, frames, text):
+        self._by_audio[hashlib.sha1(frames).digest()] = text
+
+    def pop(self, frames=b""):
+        text = self._by_audio.get(hashlib.sha1(frames).digest())
+        if text is not None:
+            return text
+        return self._queue.popleft() if self._queue else None
+
+
+def install_fake_modules(base_url, transcripts=None):
+    """Replace the service and device packages with clients of the stand-in server"""
+    transcripts = transcripts or Transcripts()
+    http = requests.Session()
+
+    def call(service, method="get", **kwargs):
+        response = http.request(method, f"{base_url}/{service}", timeout=30, **kwargs)
+        if response.status_code != 200:
+            raise ConnectionError(f"{service}: HTTP {response.status_code}")
+        return response
+
+    # speech_recognition: Google ASR
+    sr = types.ModuleType("speech_recognition")
+
+    class UnknownValueError(Exception):
+        pass
+
+    class RequestError(Exception):
+        pass
+
+    class AudioData:
+        def __init__(self, frame_data, sample_rate, sample_width):
+            self.frame_data = frame_data
+            self.sample_rate = sample_rate
+            self.sample_width = sample_width
+
+    class Recognizer:
+        def recognize_google(self, audio, language="en-US"):
+            try:
+                call("asr", "post", data=audio.frame_data)
+            except ConnectionError as e:
+                raise RequestError(str(e))
+            text = transcripts.pop(audio.frame_data)
+            if text is None:
+                raise UnknownValueError()
+            return text
+
+    sr.UnknownValueError, sr.RequestError, sr.AudioData, sr.Recognizer = \
+        UnknownValueError, RequestError, AudioData, Recognizer
+
+    # pyttsx3 and gTTS: synthesis
+    pyttsx3 = types.ModuleType("pyttsx3")
+
+    class Engine:
+        def __init__(self):
+            self.properties = {"rate": 200, "volume": 1.0, "voice": "default"}
+            self._jobs = []
+
+        def setProperty(self, name, value):
+            self.properties[name] = value
+
+        def getProperty(self, name):
+            return self.properties[name]
+
+        def save_to_file(self, text, path):
+            self._jobs.append((text, path))
+
+        def runAndWait(self):
+            jobs, self._jobs = self._jobs, []
+            for text, path in jobs:
+                with open(path, "wb") as fp:
+                    fp.write(call("tts", "post", data=text.encode("utf-8")).content)
+
+    pyttsx3.init = Engine
+
+    gtts = types.ModuleType("gtts")
+
+    class gTTS:
+        def __init__(self, text, lang="en"):
+            self.text = text
+
+        def write_to_fp(self, fp):
+            fp.write(call("tts", "post", data=self.text.encode("utf-8")).content)
+
+        def save(self, path):
+            with open(path, "wb") as fp:
+                self.write_to_fp(fp)
+
+    gtts.gTTS = gTTS
+
+    # geocoder: IP geolocation
+    geocoder = types.ModuleType("geocoder")
+
+    def ip(address):
+        try:
+            data = call("geocoder").json()
+            return types.SimpleNamespace(ok=True, city=data["city"], country=data["country"])
+        except ConnectionError:
+            return types.SimpleNamespace(ok=False, city=None, country=None)
+
+    geocoder.ip = ip
+
+    # youtube_search
+    youtube_search = types.ModuleType("youtube_search")
+
+    class YoutubeSearch:
+        def __init__(self, search_terms, max_results=10):
+            self.videos = call("youtube", params={"q": search_terms, "max_results": max_results}).json()["videos"]
+
+        def to_dict(self):
+            return self.videos
+
+    youtube_search.YoutubeSearch = YoutubeSearch
+
+    # cohere
+    cohere = types.ModuleType("cohere")
+
+    class Client:
+        def __init__(self, api_key=None, **kwargs):
+            self.api_key = api_key
+
+        def generate(self, model=None, prompt="", max_tokens=None, temperature=None, stream=False):
+            response = call("cohere", "post", json={"prompt": prompt, "stream": stream}, stream=stream)
+            if not stream:
+                text = response.json()["generations"][0]["text"]
+                return types.SimpleNamespace(generations=[types.SimpleNamespace(text=text)])
+            return (types.SimpleNamespace(text=json.loads(line)["text"])
+                    for line in response.iter_lines(chunk_size=None) if line)
+
+    cohere.Client = Client
+
+    for module in (sr, pyttsx3, gtts, geocoder, youtube_search, cohere):
+        sys.modules[module.__name__] = module
+    return transcripts
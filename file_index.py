@@ -0,0 +1,386 @@
+"""Persistent filename index used by the "find file" command"""
+import bisect
+import os
+import pickle
+import threading
+import time
+from array import array
+from itertools import accumulate
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")  # Builds the trigram posting lists
+
+INDEX_VERSION = 1
+SEPARATOR = "\0"  # Can't appear in a filename, so a query never spans two names
+REBUILD_FRACTION = 0.1  # Rebuild the main segment once this share of directories changed since
+TRIGRAM_BUCKETS = 1 << 16  # Trigrams are hashed into this many posting lists; collisions only add candidates
+POSTING_BLOCK = 1 << 16  # Names per block of posting lists, which bounds the memory used to build them
+
+
+class FileIndex:
+    """Filename index over a set of root directories.
+
+    Every directory listing is stored next to the directory's mtime, so a
+    refresh only re-reads directories whose entries changed.  Lookups run
+    against two segments: a main one built from the listings saved in the
+    index file, and a small one holding the directories that changed since,
+    whose old listings are skipped in the main segment.  A refresh only
+    rebuilds and saves the small one (to a ".changes" file next to the
+    index) until enough has changed to be worth rebuilding everything.
+    """
+
+    def __init__(self, roots, path=None):
+        self.roots = [os.path.normpath(os.path.expanduser(r)) for r in roots]
+        self.path = path
+        self.dirs = {}  # dir -> (mtime_ns, files, subdirs)
+        self.last_refresh = 0.0
+        self.loaded = False
+        self._saved = {}  # The listings the main segment was built from
+        self._generation = None  # Tells which main file a changes file belongs to
+        self._lookup = (_Segment({}), frozenset(), _Segment({}), 0)  # main, its stale dirs, changes, names
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    # ----- persistence -----
+
+    def load(self):
+        """Load the index saved by a previous run, if it matches our roots"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as fp:
+                data = pickle.load(fp)
+        except Exception as e:
+            print(f"File Index Error: {e}")
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("roots") != self.roots:
+            return False
+        saved = data["dirs"]
+        dirs = dict(saved)
+        self._generation = data.get("generation")
+        last_refresh = data.get("time", 0.0)
+        changes = self._read_changes()
+        if changes is not None:
+            dirs.update(changes["changed"])
+            for directory in changes["removed"]:
+                dirs.pop(directory, None)
+            last_refresh = changes["time"]
+        self._swap(dirs, saved)
+        self.last_refresh = last_refresh
+        return True
+
+    def save(self):
+        """Write every listing to the index file, making it the new main segment"""
+        if not self.path:
+            return
+        generation = int.from_bytes(os.urandom(8), "big")
+        try:
+            self._write(self.path, {
+                "version": INDEX_VERSION,
+                "roots": self.roots,
+                "time": self.last_refresh,
+                "generation": generation,
+                "dirs": self.dirs,
+            })
+            self._generation = generation
+            if os.path.exists(self.path + ".changes"):
+                os.remove(self.path + ".changes")
+        except Exception as e:
+            print(f"File Index Error: {e}")
+            self._generation = None  # Whatever is on disk no longer matches the segments
+
+    def _save_changes(self, changed, removed):
+        if not self.path or self._generation is None:
+            return
+        try:
+            self._write(self.path + ".changes", {
+                "version": INDEX_VERSION,
+                "generation": self._generation,
+                "time": self.last_refresh,
+                "changed": changed,
+                "removed": removed,
+            })
+        except Exception as e:
+            print(f"File Index Error: {e}")
+
+    def _read_changes(self):
+        if self._generation is None or not os.path.exists(self.path + ".changes"):
+            return None
+        try:
+            with open(self.path + ".changes", "rb") as fp:
+                changes = pickle.load(fp)
+        except Exception as e:
+            print(f"File Index Error: {e}")
+            return None
+        if changes.get("version") != INDEX_VERSION or changes.get("generation") != self._generation:
+            return None  # Left over from an older index file
+        return changes
+
+    @staticmethod
+    def _write(path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fp:
+            pickle.dump(data, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    # ----- refreshing -----
+
+    def refresh(self):
+        """Bring the index up to date and return how many directories were re-read"""
+        with self._refresh_lock:
+            old = self.dirs
+            new = {}
+            rescanned = 0
+            stack = list(reversed(self.roots))
+            while stack:
+                directory = stack.pop()
+                if directory in new:  # Roots overlap (~ contains ~/Documents)
+                    continue
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                entry = old.get(directory)
+                if entry is None or entry[0] != mtime:
+                    entry = _scan(directory, mtime)
+                    if entry is None:
+                        continue
+                    rescanned += 1
+                new[directory] = entry
+                stack.extend(os.path.join(directory, d) for d in reversed(entry[2]))
+
+            self.last_refresh = time.time()
+            if rescanned or len(new) != len(old):
+                changed, removed = _diff(self._saved, new)
+                if not self._saved or len(changed) + len(removed) > REBUILD_FRACTION * len(new):
+                    self._swap(new, new)
+                    self.save()
+                else:
+                    self._swap(new, self._saved, self._lookup[0])
+                    self._save_changes(changed, removed)
+            self.loaded = True
+            return rescanned
+
+    def refresh_in_background(self):
+        """Start a refresh on a daemon thread unless one is already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self._background_refresh, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _background_refresh(self):
+        try:
+            if not self.loaded:
+                self.load()
+            self.refresh()
+        except Exception as e:
+            print(f"File Index Error: {e}")
+
+    def prepare(self, max_age=300):
+        """Make the index usable now and refresh it in the background when stale"""
+        if not self.loaded and self._thread is not None:
+            self._thread.join()
+        if not self.loaded and not self.load():
+            self.refresh()  # First run: nothing on disk yet, build it synchronously
+        if time.time() - self.last_refresh > max_age:
+            self.refresh_in_background()
+
+    # ----- lookup -----
+
+    def __len__(self):
+        return self._lookup[3]
+
+    def search(self, query, limit=5):
+        """Return up to `limit` paths ranked exact match, then prefix, then substring"""
+        query = query.lower().strip()
+        if not query or SEPARATOR in query or limit < 1:
+            return []
+        main, stale, changes, _ = self._lookup
+
+        found = []
+        for tier in (_Segment.exact, _Segment.prefixed, _Segment.containing):
+            hits = []
+            for segment, skip in ((main, stale), (changes, ())):
+                wanted = limit - len(found)
+                for i in tier(segment, query):
+                    if segment.dir_ids[i] in skip:
+                        continue
+                    name = segment.lowered[i]
+                    hits.append((len(name), name, segment.path(i)))
+                    wanted -= 1
+                    if not wanted:
+                        break
+            hits.sort()
+            found.extend(path for _, _, path in hits[:limit - len(found)])
+            if len(found) == limit:
+                break
+        return found
+
+    def _swap(self, dirs, saved, main=None):
+        """Make `dirs` searchable, with the main segment built from `saved` (or `main`, already built from it)"""
+        if main is None:
+            main = _Segment(saved)
+        changed, removed = _diff(saved, dirs)
+        stale = frozenset(main.dir_index[d] for d in [*changed, *removed] if d in main.dir_index)
+        names = len(main) - sum(len(saved[d][1]) for d in [*changed, *removed] if d in saved)
+        changes = _Segment(changed)
+        lookup = (main, stale, changes, names + len(changes))
+        self.dirs = dirs
+        self._saved = saved
+        self._lookup = lookup  # Single assignment, so readers never see a half-built index
+        self.loaded = True
+
+
+class _Segment:
+    """The filenames of some directories, numbered in rank order: shortest first, then alphabetical.
+
+    Names of one length form a sorted run, so exact and prefix matches take
+    a bisect per length.  Substring matches are checked against the posting
+    list of the query's rarest trigram (or, for one- and two-letter queries,
+    found by str.find in one string holding every name).  Both are walked
+    in rank order, so the search stops at the first `limit` hits instead of
+    ranking every name that matches.  The posting lists are built with
+    numpy (in pure Python they cost seconds per 200k names), one block of
+    names at a time.
+    """
+
+    def __init__(self, dirs):
+        self.dirnames = list(dirs)
+        self.dir_index = {directory: dir_id for dir_id, directory in enumerate(self.dirnames)}
+        names, dir_ids = [], array("I")
+        for dir_id, (_, files, _) in enumerate(dirs.values()):
+            names.extend(files)
+            dir_ids.extend([dir_id] * len(files))
+        # Lower each name on its own (lower() can change a string's length), sharing the ones already lowercase
+        lowered = [lower if lower != name else name for name, lower in zip(names, map(str.lower, names))]
+        lengths = list(map(len, lowered))
+        order = sorted(range(len(names)), key=lowered.__getitem__)
+        order.sort(key=lengths.__getitem__)  # Stable, so names stay alphabetical within a length
+        self.lowered = list(map(lowered.__getitem__, order))
+        self.names = list(map(names.__getitem__, order))
+        self.dir_ids = array("I", map(dir_ids.__getitem__, order))
+        lengths = list(map(lengths.__getitem__, order))
+        del names, lowered, order
+
+        self.runs = []  # (length, first, end) of the names of each length
+        i = 0
+        while i < len(lengths):
+            end = bisect.bisect_right(lengths, lengths[i], i)
+            self.runs.append((lengths[i], i, end))
+            i = end
+
+        self.blob = SEPARATOR.join(self.lowered)
+        self.starts = array("Q", accumulate((length + 1 for length in lengths[:-1]), initial=0))
+        self.blocks = []  # (names' numbers grouped by trigram bucket, where each bucket starts)
+        self.bucket_sizes = np.zeros(TRIGRAM_BUCKETS, dtype=np.int64) if self.lowered else None
+        for first in range(0, len(self.lowered), POSTING_BLOCK):
+            self._index_trigrams(first, self.lowered[first:first + POSTING_BLOCK],
+                                 lengths[first:first + POSTING_BLOCK])
+
+    def _index_trigrams(self, first, names, lengths):
+        codes = np.frombuffer(SEPARATOR.join(names).encode("utf-32-le"), dtype=np.uint32)
+        numbers = np.repeat(np.arange(first, first + len(names), dtype=np.uint32), np.array(lengths) + 1)
+        a, b, c = codes[:-2], codes[1:-1], codes[2:]
+        inside = (a != 0) & (b != 0) & (c != 0)  # Not across a separator
+        buckets = _trigram_bucket(a, b, c)[inside].astype(np.uint16)
+        order = np.argsort(buckets, kind="stable")  # Radix sort; keeps each bucket's names in rank order
+        sizes = np.bincount(buckets, minlength=TRIGRAM_BUCKETS)
+        starts = np.zeros(TRIGRAM_BUCKETS + 1, dtype=np.int64)
+        np.cumsum(sizes, out=starts[1:])
+        self.blocks.append((numbers[:len(codes) - 2][inside][order], starts))
+        self.bucket_sizes += sizes
+
+    def __len__(self):
+        return len(self.names)
+
+    def path(self, i):
+        return os.path.join(self.dirnames[self.dir_ids[i]], self.names[i])
+
+    def exact(self, query):
+        """Names equal to the query, with or without their extension"""
+        for i in self._starting_with(query, len(query), len(query)):
+            yield i
+        for i in self._starting_with(query + ".", len(query) + 1):
+            if os.path.splitext(self.lowered[i])[0] == query:
+                yield i
+
+    def prefixed(self, query):
+        """Names starting with the query, except exact matches"""
+        for i in self._starting_with(query, len(query) + 1):
+            if os.path.splitext(self.lowered[i])[0] != query:
+                yield i
+
+    def containing(self, query):
+        """Names containing the query somewhere after their first character"""
+        lowered = self.lowered
+        if len(query) < 3:
+            pos = self.blob.find(query)
+            while pos != -1:
+                i = bisect.bisect_right(self.starts, pos) - 1
+                if pos != self.starts[i]:
+                    yield i
+                if i + 1 >= len(self.starts):
+                    return
+                pos = self.blob.find(query, self.starts[i + 1])  # One hit per name is enough
+            return
+        if not self.blocks:
+            return
+        grams = [query[j:j + 3] for j in range(len(query) - 2)]
+        bucket = min((int(_trigram_bucket(*map(ord, gram))) for gram in grams), key=self.bucket_sizes.__getitem__)
+        previous = None
+        for numbers, starts in self.blocks:
+            for offset in range(starts[bucket], starts[bucket + 1], 256):
+                for i in numbers[offset:min(offset + 256, starts[bucket + 1])].tolist():
+                    if i == previous:  # The name has the trigram twice, or two that share the bucket
+                        continue
+                    previous = i
+                    name = lowered[i]
+                    if query in name and not name.startswith(query):
+                        yield i
+
+    def _starting_with(self, prefix, shortest, longest=None):
+        lowered = self.lowered
+        for length, first, end in self.runs:
+            if length < shortest:
+                continue
+            if longest is not None and length > longest:
+                return
+            i = bisect.bisect_left(lowered, prefix, first, end)
+            while i < end and lowered[i].startswith(prefix):
+                yield i
+                i += 1
+
+
+def _trigram_bucket(a, b, c):
+    """Hash three code points (ints or uint32 arrays) to a posting list number"""
+    h = (a * 0x9E3779B1 + b * 0x85EBCA77 + c * 0xC2B2AE3D) & 0xFFFFFFFF
+    return h >> 16
+
+
+def _diff(saved, dirs):
+    """Directories of `dirs` whose listing isn't the one in `saved`, and directories gone since"""
+    changed = {directory: entry for directory, entry in dirs.items() if saved.get(directory) is not entry}
+    removed = [directory for directory in saved if directory not in dirs]
+    return changed, removed
+
+
+def _scan(directory, mtime):
+    """List one directory the way os.walk does (symlinked dirs are not followed)"""
+    files, subdirs = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return mtime, tuple(files), tuple(subdirs)
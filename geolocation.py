@@ -0,0 +1,161 @@
+"""Hedged IP geolocation over several providers, with a remembered last location"""
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class CircuitBreaker:
+    """Skips a provider after `threshold` failures in a row, retrying after `reset_after` seconds.
+
+    Once `reset_after` has passed, allow() lets a single caller through to
+    probe the provider; everyone else keeps skipping it until that probe
+    succeeds, or for another `reset_after` if it fails or never reports back.
+    """
+
+    def __init__(self, threshold=3, reset_after=60):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_after:
+                return False
+            self.opened_at = now  # Half-open: this caller is the probe
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+    """A named lookup() -> (city, country), returning None or raising on failure"""
+
+    def __init__(self, name, lookup, breaker=None):
+        self.name = name
+        self.lookup = lookup
+        self.breaker = breaker or CircuitBreaker()
+
+    def __call__(self):
+        try:
+            result = self.lookup()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if not result or not result[0]:
+            self.breaker.record_failure()
+            raise LookupError(f"{self.name}: no location")
+        self.breaker.record_success()
+        return tuple(result)
+
+
+class Locator:
+    """Races providers in priority order and keeps the first good answer.
+
+    The first provider starts right away; each later one starts after
+    `hedge_delay` seconds without an answer, or immediately when everything
+    started so far has failed.  Providers whose breaker is open are skipped.
+    The last good location is saved to `path`.
+    """
+
+    def __init__(self, providers, path=None, hedge_delay=0.3, timeout=5):
+        self.providers = providers
+        self.path = path
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max(2, len(providers) * 2), thread_name_prefix="geo")
+        self._refreshing = threading.Lock()
+
+    def locate(self):
+        """Query the providers now; returns (city, country) or None"""
+        waiting = [p for p in self.providers if p.breaker.allow()]
+        running = {}
+        deadline = time.monotonic() + self.timeout
+        hedge_due = True
+        while waiting or running:
+            if waiting and (not running or hedge_due):
+                provider = waiting.pop(0)
+                # In the caller's context, so the lookup is traced as part of its turn
+                running[self._pool.submit(contextvars.copy_context().run, provider)] = provider
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(running, timeout=min(self.hedge_delay, remaining) if waiting else remaining,
+                           return_when=FIRST_COMPLETED)
+            hedge_due = not done
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    location = future.result()
+                except Exception as e:
+                    print(f"Location Error ({provider.name}): {e}")
+                    hedge_due = True
+                    continue
+                self._remember(location, provider.name)
+                return location
+        return None
+
+    def locate_cached(self, refresh_after=600):
+        """The last known location right away, refreshed in the background when old.
+
+        Only blocks on the providers when no location has ever been found.
+        """
+        saved = self.last_known()
+        if saved is None:
+            return self.locate()
+        if time.time() - saved["time"] > refresh_after:
+            self.refresh_in_background()
+        return saved["city"], saved["country"]
+
+    def refresh_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return  # Already refreshing
+
+        def refresh():
+            try:
+                self.locate()
+            finally:
+                self._refreshing.release()
+        self._pool.submit(refresh)
+
+    def last_known(self):
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def _remember(self, location, source):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + f".{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump({"city": location[0], "country": location[1],
+                           "source": source, "time": time.time()}, fp)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Location Error: {e}")
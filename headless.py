@@ -0,0 +1,150 @@
+"""Text frontend: drive JARVIS from stdin, a script file or a JSONL transcript.
+
+    python headless.py                         # type commands, one per line
+    python headless.py session.txt             # one utterance per line, "---" between sessions
+    python headless.py transcript.jsonl        # {"id": ..., "lang": "en", "turns": [...]} per line
+    python headless.py transcript.jsonl --repeat 1000 --workers 64 --out results.jsonl
+
+Every utterance the assistant would have heard (including answers to
+follow-up questions in the weather and file search flows) comes from the
+script; everything it says or does is recorded instead of played.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+import tracing
+from session import ConversationEnded, Session, using
+
+
+class ScriptedSession(Session):
+    """A session whose listen() reads the script and whose output is recorded"""
+
+    def __init__(self, turns, session_id=None, lang="en", echo=False):
+        super().__init__(lang=lang, listen=self._listen, speak=self._speak,
+                         act=self._act, session_id=session_id)
+        self.script = iter(turns)
+        self.events = []
+        self.echo = echo
+
+    def _listen(self):
+        text = next(self.script, None)
+        if text is None:
+            raise ConversationEnded
+        text = text.strip().lower()
+        self._log("user", text)
+        return text
+
+    def _speak(self, text):
+        self._log("jarvis", text)
+
+    def _act(self, action, target):
+        self._log("action", f"{action} {target}" if target is not None else action)
+
+    def _log(self, kind, text):
+        self.events.append({"t": time.perf_counter(), "kind": kind, "text": text})
+        if self.echo and kind != "user":
+            print(f"{'Jarvis' if kind == 'jarvis' else 'Action'}: {text}")
+
+
+def run_session(turns, session_id=None, lang="en", echo=False):
+    """Run one scripted conversation to the end and return what happened"""
+    session = ScriptedSession(turns, session_id, lang, echo)
+    latencies = []
+    with using(session):
+        try:
+            while True:
+                app.say("help")
+                command = app.listen()
+                with tracing.turn(session_id):
+                    start = time.perf_counter()
+                    app.handle_command(command)
+                    latencies.append(time.perf_counter() - start)
+        except ConversationEnded:
+            pass
+        except SystemExit:  # "exit" ends the conversation
+            pass
+    started = session.events[0]["t"] if session.events else 0
+    return {
+        "id": session_id,
+        "lang": session.lang,
+        "events": [{**e, "t": round((e["t"] - started) * 1000, 3)} for e in session.events],
+        "latency_ms": [round(x * 1000, 3) for x in latencies],
+    }
+
+
+def load_sessions(path):
+    """Yield (session id, lang, turns) from a text file or a JSONL transcript"""
+    with open(path, encoding="utf-8") as fp:
+        if path.endswith(".jsonl"):
+            grouped = {}
+            for n, line in enumerate(fp):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if "turns" in row:
+                    yield row.get("id", n), row.get("lang", "en"), row["turns"]
+                else:  # One turn per line, grouped by "session"
+                    sid = row.get("session", 0)
+                    grouped.setdefault(sid, (row.get("lang", "en"), []))[1].append(row["text"])
+            for sid, (lang, turns) in grouped.items():
+                yield sid, lang, turns
+        else:
+            turns = []
+            count = 0
+            for line in fp:
+                if line.strip() == "---":
+                    yield count, "en", turns
+                    turns, count = [], count + 1
+                elif line.strip():
+                    turns.append(line)
+            if turns:
+                yield count, "en", turns
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run JARVIS without a microphone or speakers")
+    parser.add_argument("script", nargs="?", help="Text file or .jsonl transcript (default: stdin)")
+    parser.add_argument("--lang", default="en", help="Starting language for stdin sessions")
+    parser.add_argument("--repeat", type=int, default=1, help="Run every scripted session this many times")
+    parser.add_argument("--workers", type=int, default=32, help="Sessions running at once")
+    parser.add_argument("--out", help="Write one JSON result per session to this file")
+    parser.add_argument("--echo", action="store_true", help="Print responses of scripted sessions")
+    args = parser.parse_args()
+
+    if args.script is None:
+        run_session((line for line in sys.stdin), "stdin", args.lang, echo=True)
+        return
+
+    sessions = [(f"{sid}#{i}" if args.repeat > 1 else sid, lang, turns)
+                for sid, lang, turns in load_sessions(args.script)
+                for i in range(args.repeat)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda s: run_session(s[2], s[0], s[1], args.echo), sessions))
+    wall = time.perf_counter() - start
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fp:
+            for result in results:
+                fp.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    latencies = [x for r in results for x in r["latency_ms"]]
+    print(f"Sessions: {len(results)}  turns: {len(latencies)}  wall: {wall:.2f}s  "
+          f"({len(results) / wall:.1f} sessions/s)", file=sys.stderr)
+    if latencies:
+        print(f"Command latency ms  mean {statistics.mean(latencies):.2f}  p50 {percentile(latencies, 50):.2f}  "
+              f"p95 {percentile(latencies, 95):.2f}  p99 {percentile(latencies, 99):.2f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Shared HTTP client: pooled connections, TTL response cache, request coalescing"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+
+
+class _Call:
+    """One in-flight fetch that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class HttpClient:
+    """One requests.Session for the whole app plus a persistent response cache.
+
+    Cached values expire after the `ttl` given by each caller, so weather and
+    geolocation can keep different lifetimes.  When several threads ask for
+    the same thing at once, only the first one goes to the network and the
+    rest wait for its answer.
+    """
+
+    def __init__(self, cache_path=None, pool_size=10):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache_path = cache_path
+        self.cache = {}  # key -> (expires_at, value)
+        self.stats = {"network": 0, "cache_hits": 0, "coalesced": 0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def get_json(self, url, params=None, ttl=0, timeout=5, name=None):
+        """GET a JSON document, served from the cache while younger than `ttl` seconds.
+
+        Network requests are traced as the stage "net:<name>" (default: the host).
+        """
+        key = _cache_key(url, params)
+
+        def load():
+            with tracing.stage(f"net:{name or urlsplit(url).netloc}"):
+                response = self.session.get(url, params=params, timeout=timeout)
+                data = response.json()
+            return data, response.ok  # Don't cache error responses
+
+        return self.fetch(key, ttl, load)
+
+    def cached(self, name, ttl, loader):
+        """Cache the result of an arbitrary call (e.g. a third-party client); None isn't cached"""
+        def load():
+            value = loader()
+            return value, value is not None
+        return self.fetch(_cache_key(name, None), ttl, load)
+
+    def fetch(self, key, ttl, load):
+        """Return the cached value for `key` or run load() -> (value, cacheable) once"""
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.stats["cache_hits"] += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _Call()
+                self.stats["network"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            value, cacheable = load()
+            call.result = value
+            if ttl and cacheable:
+                with self._lock:
+                    self.cache[key] = (time.time() + ttl, value)
+                self.save()
+            return value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as fp:
+                saved = json.load(fp)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self.cache = {key: (expires, value) for key, (expires, value) in saved.items() if expires > now}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        now = time.time()
+        with self._lock:
+            self.cache = {key: entry for key, entry in self.cache.items() if entry[0] > now}
+            snapshot = dict(self.cache)
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+                tmp = self.cache_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as fp:
+                    json.dump(snapshot, fp)
+                os.replace(tmp, self.cache_path)
+            except OSError as e:
+                print(f"HTTP Cache Error: {e}")
+
+
+def _cache_key(url, params):
+    # Hashed, so API keys in the query string never end up in the cache file
+    raw = url + "?" + json.dumps(sorted((params or {}).items()), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,183 @@
+"""Keyword intent routing compiled into a single Aho-Corasick automaton"""
+import unicodedata
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace; phrases and commands go through the same path"""
+    return " ".join(text.lower().split())
+
+
+def is_word_char(ch):
+    # Devanagari vowel signs are combining marks, so isalnum() alone would
+    # treat "कमरा" as "क" + boundary + "मरा"
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch)[0] == "M"
+
+
+class Intent:
+    """A command: trigger phrases per language, a handler and a priority.
+
+    handler(command, match) receives the normalized command and the Match
+    that selected it.  When several intents match, the highest priority
+    wins, then the longest phrase, then the earliest one.  early=True marks
+    short commands that may run on a partial transcript (see early_match).
+    leading=True marks commands whose phrase is the verb of the sentence
+    ("play ..."): when it opens the command (closes it in Hindi, which puts
+    the verb last), it beats every other intent, so "play lock and key"
+    plays a song instead of locking the screen.
+
+    anchor keeps commands that are disruptive to trigger by mistake from
+    matching a word in passing: anchor="verb" only matches where the verb
+    goes, as for leading ("lock the screen", not "i need to lock in"), and
+    anchor="whole" only when the phrase is the whole command ("quit", not
+    "quit smoking tips").
+    """
+
+    def __init__(self, name, handler, priority=0, early=False, leading=False, anchor=None, **phrases):
+        self.name = name
+        self.handler = handler
+        self.priority = priority
+        self.early = early
+        self.leading = leading
+        self.anchor = anchor
+        self.phrases = phrases  # lang -> list of phrases
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, priority={self.priority})"
+
+
+class Match:
+    def __init__(self, intent, phrase, lang, start, end):
+        self.intent = intent
+        self.phrase = phrase
+        self.lang = lang
+        self.start = start
+        self.end = end
+
+    def remainder(self, command):
+        """The command with the matched phrase cut out (e.g. the query after "play")"""
+        return normalize(command[:self.start] + " " + command[self.end:])
+
+    def __repr__(self):
+        return f"Match({self.intent.name!r}, {self.phrase!r}, {self.start}:{self.end})"
+
+
+class IntentRouter:
+    """Matches a command against every intent phrase in one pass over the text"""
+
+    def __init__(self, intents=()):
+        self.intents = []
+        self._compiled = None
+        for intent in intents:
+            self.add(intent)
+
+    def add(self, intent):
+        self.intents.append(intent)
+        self._compiled = None
+
+    def compile(self):
+        """Build the automaton; called lazily on the first match after a change"""
+        goto = [{}]
+        fail = [0]
+        outputs = [[]]  # node -> [(phrase length, entry)]
+        for intent in self.intents:
+            for lang, phrases in intent.phrases.items():
+                for phrase in phrases:
+                    phrase = normalize(phrase)
+                    node = 0
+                    for ch in phrase:
+                        nxt = goto[node].get(ch)
+                        if nxt is None:
+                            nxt = len(goto)
+                            goto[node][ch] = nxt
+                            goto.append({})
+                            fail.append(0)
+                            outputs.append([])
+                        node = nxt
+                    outputs[node].append((len(phrase), (intent, phrase, lang)))
+
+        # Breadth-first pass to fill in failure links and merge outputs;
+        # depth-1 nodes keep failing to the root
+        queue = list(goto[0].values())
+        for node in queue:
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._compiled = (goto, fail, outputs)
+        return self._compiled
+
+    def matches(self, command):
+        """Every whole-word phrase occurrence in the command, where its intent's anchor allows it"""
+        goto, fail, outputs = self._compiled or self.compile()
+        text = normalize(command)
+        found = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, (intent, phrase, lang) in outputs[node]:
+                start, end = i + 1 - length, i + 1
+                if start > 0 and is_word_char(text[start - 1]) and is_word_char(text[start]):
+                    continue
+                if end < len(text) and is_word_char(text[end]) and is_word_char(text[end - 1]):
+                    continue
+                match = Match(intent, phrase, lang, start, end)
+                if _anchored(match, len(text)):
+                    found.append(match)
+        return found
+
+    def match(self, command):
+        """The winning Match for the command, or None if nothing matched"""
+        length = len(normalize(command))
+        best = None
+        for m in self.matches(command):
+            if best is None or _rank(m, length) > _rank(best, length):
+                best = m
+        return best
+
+    def early_match(self, text):
+        """The Match when all of `text` is one phrase of an early intent, else None.
+
+        Meant for partial transcripts: "open downloads" can be acted on before
+        the recognizer has finished, while "open downloads and ..." cannot.
+        """
+        text = normalize(text)
+        match = self.match(text)
+        if match is not None and match.intent.early and match.start == 0 and match.end == len(text):
+            return match
+        return None
+
+    def dispatch(self, command, fallback):
+        """Run the matched intent's handler, or fallback(command) when nothing matched"""
+        command = normalize(command)
+        match = self.match(command)
+        if match is None:
+            return fallback(command)
+        return match.intent.handler(command, match)
+
+
+def _at_verb(m, length):
+    """Whether the phrase is where the verb goes in its language: first, or last in Hindi"""
+    return m.end == length if m.lang == "hi" else m.start == 0
+
+
+def _anchored(m, length):
+    if m.intent.anchor == "whole":
+        return m.start == 0 and m.end == length
+    if m.intent.anchor == "verb":
+        return _at_verb(m, length)
+    return True
+
+
+def _leads(m, length):
+    """Whether a leading intent's phrase is where the verb goes in its language"""
+    return m.intent.leading and _at_verb(m, length)
+
+
+def _rank(m, length):
+    return _leads(m, length), m.intent.priority, m.end - m.start, -m.start
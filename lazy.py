@@ -0,0 +1,56 @@
+"""Deferred imports and startup timing"""
+import contextlib
+import importlib
+import threading
+import time
+
+# (label, seconds) for every lazy import and timed initialization, in order
+timings = []
+_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def timed(label):
+    """Record how long the block took under `label`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((label, time.perf_counter() - start))
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    with timed(f"import {self._name}"):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def report(total=None):
+    """Startup cost breakdown, slowest first"""
+    lines = ["Startup profile:"]
+    for label, seconds in sorted(timings, key=lambda t: -t[1]):
+        lines.append(f"  {seconds * 1000:9.1f} ms  {label}")
+    if total is not None:
+        lines.append(f"  {total * 1000:9.1f} ms  total")
+    return "\n".join(lines)
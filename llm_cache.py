@@ -0,0 +1,179 @@
+"""Response cache and bounded conversation history for the LLM fallback"""
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")  # Only needed once something is cached
+
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    # By category rather than [^\w\s], which would also drop Devanagari vowel signs
+    return " ".join("".join(" " if unicodedata.category(c)[0] in "PS" else c for c in text.lower()).split())
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+# Question words and fillers that don't change what is being asked
+STOPWORDS = set("""
+a about an are can could do does for how i in is me my of on please tell the to what whats
+who would you का की के को क्या कौन कैसे है हैं में मुझे बताओ से
+""".split())
+
+
+# Openers and words that point back at the conversation ("and its population?",
+# "who founded it"); questions using them can't be answered for anyone else
+FOLLOW_UP_OPENERS = ("and", "but", "also", "so", "what about", "how about", "और", "तो")
+REFERENCES = set("""
+it its itself they them their theirs he him his she her hers that this these those there then
+same another again else more former latter
+यह ये वह वो वे इस इसका इसकी इसके इसे उस उसका उसकी उसके उसे उन उनका उनकी उनके उन्हें वहाँ वहां
+""".split())
+
+
+def is_follow_up(question):
+    """True when the question only makes sense after the conversation before it"""
+    text = normalize_question(question)
+    return (text.startswith(tuple(opener + " " for opener in FOLLOW_UP_OPENERS))
+            or any(word in REFERENCES for word in text.split()))
+
+
+class HashingVectorizer:
+    """Content words plus their character trigrams, hashed into an L2-normalized vector.
+
+    Whole words get more weight than trigrams, so "capital of france" and
+    "capital of germany" stay apart while spelling variants still land close.
+    """
+
+    def __init__(self, dim=4096, word_weight=3.0):
+        self.dim = dim
+        self.word_weight = word_weight
+
+    def __call__(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = text.split()
+        for word in [w for w in words if w not in STOPWORDS] or words:
+            self._add(vector, "w:" + word, self.word_weight)
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                self._add(vector, padded[i:i + 3], 1.0)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _add(self, vector, feature, weight):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+
+class ResponseCache:
+    """Exact and semantic cache of LLM answers.
+
+    A question is first looked up by its normalized text.  Failing that, its
+    hashed n-gram vector is compared against every cached question in the
+    same language, and the closest one is used when its cosine similarity
+    reaches `threshold`.  Entries expire after `ttl` seconds and the least
+    recently used one is dropped once `max_entries` is reached.
+    """
+
+    def __init__(self, threshold=0.85, ttl=24 * 60 * 60, max_entries=500, dim=4096):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vectorize = HashingVectorizer(dim)
+        self.vectors = None  # max_entries x dim, allocated on the first put()
+        self.rows = [None] * max_entries  # row -> key
+        self.entries = OrderedDict()  # (lang, question) -> [answer, created, row, tokens]
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def get(self, question, lang="en"):
+        """The cached answer for `question`, or None"""
+        key = (lang, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            kind = "exact_hits"
+            if entry is None and self.entries:
+                key, entry = self._nearest(key, now)
+                kind = "semantic_hits"
+            if entry is None or now - entry[1] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats[kind] += 1
+            self.stats["tokens_saved"] += entry[3]
+            return entry[0]
+
+    def put(self, question, answer, lang="en", tokens=0):
+        """Remember an answer; `tokens` is what generating it cost"""
+        key = (lang, normalize_question(question))
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                row = old[2]
+            elif len(self.entries) < self.max_entries:
+                row = self.rows.index(None)
+            else:
+                _, evicted = self.entries.popitem(last=False)
+                row = evicted[2]
+            if self.vectors is None:
+                self.vectors = np.zeros((self.max_entries, self.vectorize.dim), dtype=np.float32)
+            self.vectors[row] = self.vectorize(key[1])
+            self.rows[row] = key
+            self.entries[key] = [answer, time.time(), row, tokens]
+
+    def hit_rate(self):
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def _nearest(self, key, now):
+        scores = self.vectors @ self.vectorize(key[1])
+        for row in np.argsort(scores)[::-1]:
+            if scores[row] < self.threshold:
+                break
+            candidate = self.rows[row]
+            if candidate is None or candidate[0] != key[0]:
+                continue
+            entry = self.entries[candidate]
+            if now - entry[1] <= self.ttl:
+                return candidate, entry
+        return key, None
+
+
+class Conversation:
+    """Recent exchanges, trimmed from the oldest so the prompt stays within `token_budget`"""
+
+    def __init__(self, token_budget=400, max_turns=20):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.turns = []  # (user, assistant)
+
+    def add(self, user, assistant):
+        self.turns.append((user, assistant))
+        del self.turns[:-self.max_turns]
+
+    def prompt(self, command):
+        """The prompt for `command` with as much recent history as the budget allows"""
+        tail = f"User: {command}\nJarvis:"
+        used = estimate_tokens(tail)
+        history = []
+        for user, assistant in reversed(self.turns):
+            exchange = f"User: {user}\nJarvis: {assistant}\n"
+            cost = estimate_tokens(exchange)
+            if used + cost > self.token_budget:
+                break
+            history.append(exchange)
+            used += cost
+        prompt = "".join(reversed(history)) + tail
+        while history and estimate_tokens(prompt) > self.token_budget:  # Per-piece rounding
+            history.pop()
+            prompt = "".join(reversed(history)) + tail
+        return prompt
@@ -0,0 +1,44 @@
+"""Turn a stream of LLM tokens into speakable sentences"""
+import re
+
+# Sentence-ending punctuation (including the Devanagari danda) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?।]+[\"')\]]*\s+")
+
+
+class SentenceSplitter:
+    """Buffers streamed text and hands back whole sentences as soon as they end.
+
+    Pieces shorter than `min_chars` are held back and joined with the next
+    sentence, so abbreviations like "Dr." and very short fragments don't
+    turn into separate utterances.
+    """
+
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add streamed text and return the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for end in SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:end.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = end.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Whatever is left once the stream ends"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def stream_sentences(tokens, min_chars=12):
+    """Yield sentences from an iterable of text tokens"""
+    splitter = SentenceSplitter(min_chars)
+    for token in tokens:
+        yield from splitter.feed(token)
+    yield from splitter.flush()
@@ -0,0 +1,64 @@
+"""Message catalog: every phrase JARVIS says, by stable ID, in every language.
+
+Each language is a JSON file in locales/ ("hi.json") mapping message IDs to
+str.format templates:
+
+    "weather_response": "The current temperature in {city}, {country} is {temp}°C with {desc}"
+
+Adding a file adds a language; messages it doesn't translate fall back to
+the default language.  The files are read once, into one tuple of
+templates per language indexed by message number.
+"""
+import json
+import os
+import string
+
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+
+def is_static(template):
+    """True when the template has no {fields}, so its text is known ahead of time"""
+    return not any(field is not None for _, field, _, _ in string.Formatter().parse(template))
+
+
+class Catalog:
+    """Templates by (language, message ID), loaded from a directory of JSON files"""
+
+    def __init__(self, directory=LOCALE_DIR, default="en"):
+        tables = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".json"):
+                with open(os.path.join(directory, name), encoding="utf-8") as fp:
+                    tables[name[:-len(".json")]] = json.load(fp)
+        if default not in tables:
+            raise ValueError(f"no {default}.json in {directory}")
+        unknown = set().union(*tables.values()) - set(tables[default])
+        if unknown:
+            raise ValueError(f"messages missing from {default}.json: {', '.join(sorted(unknown))}")
+
+        self.default = default
+        self.languages = tuple(tables)
+        self.ids = {message_id: number for number, message_id in enumerate(tables[default])}
+        fallback = tables[default]
+        self._templates = {lang: tuple(table.get(message_id, fallback[message_id]) for message_id in self.ids)
+                           for lang, table in tables.items()}
+        # Static messages are stored already formatted ("{{" -> "{"), templates as None
+        self._static = {lang: tuple(t.format() if is_static(t) else None for t in templates)
+                        for lang, templates in self._templates.items()}
+
+    def text(self, lang, message_id, **params):
+        """The message in `lang` (or the default language), filled in with `params`"""
+        if lang not in self._templates:
+            lang = self.default
+        number = self.ids[message_id]
+        static = self._static[lang][number]
+        if static is not None:
+            return static
+        return self._templates[lang][number].format(**params)
+
+    def static_messages(self):
+        """(language, message ID, text) of every message without parameters"""
+        for lang, texts in self._static.items():
+            for message_id, number in self.ids.items():
+                if texts[number] is not None:
+                    yield lang, message_id, texts[number]
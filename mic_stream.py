@@ -0,0 +1,288 @@
+"""Continuously open microphone stream with energy-based endpointing"""
+import collections
+import queue
+import threading
+import time
+import wave
+from array import array
+
+SAMPLE_TYPECODES = {2: "h", 4: "i"}
+
+
+def rms(chunk, sample_width):
+    """Root-mean-square energy of a chunk of little-endian PCM"""
+    samples = array(SAMPLE_TYPECODES[sample_width])
+    samples.frombytes(chunk[:len(chunk) - len(chunk) % sample_width])
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+
+class MicrophoneSource:
+    """speech_recognition.Microphone adapted to the read() interface MicStream uses"""
+
+    def __init__(self, device_index=None):
+        import speech_recognition as sr
+        self._mic = sr.Microphone(device_index=device_index)
+        self._mic.__enter__()
+        self.SAMPLE_RATE = self._mic.SAMPLE_RATE
+        self.SAMPLE_WIDTH = self._mic.SAMPLE_WIDTH
+        self.CHUNK = self._mic.CHUNK
+
+    def read(self):
+        return self._mic.stream.read(self.CHUNK)
+
+    def close(self):
+        self._mic.__exit__(None, None, None)
+
+
+class WavSource:
+    """Fake microphone that plays WAV files into the stream.
+
+    Files queued with feed() are read in order with silence in between; once
+    they run out the source keeps producing silence until closed.  With
+    realtime=True chunks arrive at the pace a real device would deliver them.
+    """
+
+    def __init__(self, paths=(), sample_rate=16000, sample_width=2, chunk=1024, realtime=False):
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = sample_width
+        self.CHUNK = chunk
+        self.realtime = realtime
+        self._pending = collections.deque()
+        self._current = b""
+        self._closed = False
+        self._next_at = None
+        for path in paths:
+            self.feed(path)
+
+    def feed(self, path):
+        with wave.open(path, "rb") as wav:
+            if wav.getframerate() != self.SAMPLE_RATE or wav.getsampwidth() != self.SAMPLE_WIDTH \
+                    or wav.getnchannels() != 1:
+                raise ValueError(f"{path}: expected mono {self.SAMPLE_WIDTH * 8}-bit {self.SAMPLE_RATE} Hz")
+            self._pending.append(wav.readframes(wav.getnframes()))
+
+    def read(self):
+        if self._closed:
+            return b""
+        size = self.CHUNK * self.SAMPLE_WIDTH
+        if not self._current and self._pending:
+            self._current = self._pending.popleft()
+        chunk, self._current = self._current[:size], self._current[size:]
+        chunk += b"\0" * (size - len(chunk))
+        if self.realtime:
+            now = time.monotonic()
+            self._next_at = max(self._next_at or now, now - 0.5) + self.CHUNK / self.SAMPLE_RATE
+            if self._next_at > now:
+                time.sleep(self._next_at - now)
+        return chunk
+
+    def close(self):
+        self._closed = True
+
+
+class EnergyVAD:
+    """Speech is any chunk whose RMS energy is well above the noise floor.
+
+    The noise floor is measured from the first `calibration_chunks` chunks
+    and then tracked with a slow moving average while nobody is talking.
+    """
+
+    def __init__(self, sample_width, calibration_chunks, energy_ratio=1.5, min_energy=300, adapt_rate=0.05):
+        self.sample_width = sample_width
+        self.calibration_chunks = calibration_chunks
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.adapt_rate = adapt_rate
+        self.noise_energy = None
+        self.threshold = min_energy
+        self._calibration = []
+
+    @property
+    def ready(self):
+        return self.noise_energy is not None
+
+    def is_speech(self, chunk, in_speech):
+        energy = rms(chunk, self.sample_width)
+        if self.noise_energy is None:
+            self._calibration.append(energy)
+            if len(self._calibration) >= self.calibration_chunks:
+                self._set_noise(sum(self._calibration) / len(self._calibration))
+            return False
+        speech = energy > self.threshold
+        if not speech and not in_speech:
+            self._set_noise(self.noise_energy + self.adapt_rate * (energy - self.noise_energy))
+        return speech
+
+    def _set_noise(self, energy):
+        self.noise_energy = energy
+        self.threshold = max(self.min_energy, energy * self.energy_ratio)
+
+
+class WebRtcVAD:
+    """WebRTC's voice activity detector (pip install webrtcvad).
+
+    Tells speech from steady noise (fans, traffic) that would keep an energy
+    threshold open, so a shorter end-of-speech pause is safe.  A chunk is
+    speech when most of its 30 ms frames are.  Needs 16-bit audio at 8, 16,
+    32 or 48 kHz.
+    """
+
+    ready = True
+
+    def __init__(self, sample_rate, sample_width=2, aggressiveness=2, frame_ms=30):
+        import webrtcvad
+        if sample_width != 2:
+            raise ValueError("webrtcvad needs 16-bit audio")
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * frame_ms // 1000 * sample_width
+
+    def is_speech(self, chunk, in_speech):
+        size = self.frame_bytes
+        frames = [chunk[i:i + size] for i in range(0, len(chunk) - size + 1, size)]
+        voiced = sum(self._vad.is_speech(frame, self.sample_rate) for frame in frames)
+        return bool(frames) and voiced * 2 >= len(frames)
+
+
+class Utterance:
+    def __init__(self, frames, started, ended, speech_ended=None):
+        self.frames = frames
+        self.started = started  # time.monotonic() of the first voiced chunk
+        self.ended = ended  # When the endpoint was detected
+        self.speech_ended = ended if speech_ended is None else speech_ended  # Last voiced chunk
+
+
+class MicStream:
+    """Reads a source on a background thread and splits it into utterances.
+
+    `vad` decides which chunks are speech; by default an EnergyVAD
+    calibrated on the first `calibration_seconds`, so callers never pay for
+    adjust_for_ambient_noise again.  An utterance ends after `pause_seconds`
+    without speech.  Recent audio is kept in a ring buffer and used as
+    pre-roll for the next utterance, so the first syllable isn't clipped.
+    Utterances can be read whole (next_utterance) or chunk by chunk while
+    they are spoken (utterance_chunks), e.g. for a streaming recognizer.
+    """
+
+    def __init__(self, source, calibration_seconds=1.0, pause_seconds=0.8,
+                 phrase_time_limit=8, preroll_seconds=0.3, energy_ratio=1.5,
+                 min_energy=300, adapt_rate=0.05, vad=None):
+        self.source = source
+        self.sample_rate = source.SAMPLE_RATE
+        self.sample_width = source.SAMPLE_WIDTH
+        seconds_per_chunk = self.seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        self.pause_chunks = max(1, int(pause_seconds / seconds_per_chunk))
+        self.phrase_chunks = max(1, int(phrase_time_limit / seconds_per_chunk))
+        self.vad = vad or EnergyVAD(self.sample_width, max(1, int(calibration_seconds / seconds_per_chunk)),
+                                    energy_ratio, min_energy, adapt_rate)
+        self.ring = collections.deque(maxlen=max(1, int(preroll_seconds / seconds_per_chunk)))
+        self.in_speech = False
+        # ("start", started, chunks so far), ("chunk", chunk), ("end", Utterance)
+        self.events = queue.Queue()
+        self.last_utterance = None  # The one read last, once it has ended
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def calibrated(self):
+        return self.vad.ready
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="mic", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.source.close()
+
+    def next_utterance(self, timeout=10, started_after=None):
+        """Return the next endpointed utterance as raw PCM, or None on timeout.
+
+        Like Recognizer.listen(), `timeout` only bounds the wait for speech
+        to begin.  Utterances that started before `started_after` (for example
+        our own voice picked up while speaking) are skipped.
+        """
+        for _ in self.utterance_chunks(timeout, started_after):
+            pass
+        return self.last_utterance.frames if self.last_utterance else None
+
+    def utterance_chunks(self, timeout=10, started_after=None):
+        """Yield the next utterance chunk by chunk (pre-roll first) as it is spoken.
+
+        Same `timeout` and `started_after` rules as next_utterance().  Once the
+        utterance is endpointed the generator ends and last_utterance holds
+        all of it.  A caller may also stop early; later calls skip the rest.
+        """
+        self.last_utterance = None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        current = False  # Inside an utterance we are yielding
+        while True:
+            remaining = None if deadline is None or current else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                if not self.in_speech:
+                    return
+                remaining = 0.05  # Speech began in time, wait for it to end
+            try:
+                event = self.events.get(timeout=remaining)
+            except queue.Empty:
+                if self._stop.is_set() or (self._thread is not None and not self._thread.is_alive()):
+                    return
+                continue
+            kind = event[0]
+            if kind == "start":
+                current = started_after is None or event[1] >= started_after
+                if current:
+                    yield from event[2]
+            elif kind == "chunk":
+                if current:
+                    yield event[1]
+            elif current:
+                self.last_utterance = event[1]
+                return
+
+    def _run(self):
+        voiced = []
+        silent_run = 0
+        started = 0.0
+        while not self._stop.is_set():
+            try:
+                chunk = self.source.read()
+            except Exception as e:
+                print(f"Microphone Error: {e}")
+                break
+            if not chunk:
+                break
+            now = time.monotonic()
+            speech = self.vad.is_speech(chunk, self.in_speech)
+
+            if not self.in_speech:
+                if speech:
+                    self.in_speech = True
+                    started = now
+                    voiced = list(self.ring)
+                    voiced.append(chunk)
+                    silent_run = 0
+                    self.events.put(("start", started, list(voiced)))
+                else:
+                    self.ring.append(chunk)
+                continue
+
+            voiced.append(chunk)
+            self.events.put(("chunk", chunk))
+            silent_run = 0 if speech else silent_run + 1
+            if silent_run >= self.pause_chunks or len(voiced) >= self.phrase_chunks:
+                frames = voiced[:len(voiced) - silent_run + 1] if silent_run else voiced
+                self.events.put(("end", Utterance(b"".join(frames), started, now,
+                                                  now - silent_run * self.seconds_per_chunk)))
+                self.in_speech = False
+                self.ring.clear()
+                voiced = []
+
+        if voiced:  # Source ended mid-utterance
+            self.events.put(("end", Utterance(b"".join(voiced), started, time.monotonic())))
+            self.in_speech = False
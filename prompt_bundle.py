@@ -0,0 +1,88 @@
+"""Pre-rendered audio for the fixed prompts, packed into one memory-mapped file.
+
+    python app.py --build-prompts
+
+The bundle is a header, a JSON index from content key (tts_cache.cache_key
+of language, voice, rate and text) to (offset, length, format), and then the
+audio of every prompt back to back.  It is mapped into memory at startup;
+a prompt then plays straight from the mapping, with no synthesis and no
+file per prompt.  Keys include the voice and rate, so entries from another
+voice configuration are simply never hit.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"JARVIS-PROMPTS-1\n"
+_LENGTH = struct.Struct("<I")
+
+
+class Clip(io.BytesIO):
+    """In-memory audio that knows its format ("wav", "mp3"), for players that need a hint"""
+
+    def __init__(self, data, format):
+        super().__init__(data)
+        self.format = format
+
+
+def write_bundle(path, entries):
+    """Pack (key, data, format) entries into a bundle at `path`, replacing it atomically"""
+    index, blobs, offset = {}, [], 0
+    for key, data, format in entries:
+        index[key] = [offset, len(data), format]
+        blobs.append(data)
+        offset += len(data)
+    header = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fp:
+        fp.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        for data in blobs:
+            fp.write(data)
+    os.replace(tmp, path)
+    return len(index)
+
+
+class PromptBundle:
+    """Read-only view of a bundle file; empty when the file is missing or invalid"""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self._map = None
+        self._base = 0
+        try:
+            with open(path, "rb") as fp:
+                self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # Missing, or empty (mmap can't map 0 bytes)
+            return
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError("not a prompt bundle")
+            start = len(MAGIC) + _LENGTH.size
+            (length,) = _LENGTH.unpack_from(self._map, len(MAGIC))
+            self.index = json.loads(self._map[start:start + length])
+            self._base = start + length
+        except (ValueError, struct.error) as e:
+            print(f"Prompt Bundle Error: {e}")
+            self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, key):
+        """The audio for `key` as a Clip, or None"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, length, format = entry
+        start = self._base + offset
+        return Clip(self._map[start:start + length], format)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.index = {}
@@ -0,0 +1,526 @@
+"""Server mode: one JARVIS process serving many clients over HTTP and WebSocket.
+
+    python server.py --port 8765
+
+Every client gets its own session: language, LLM history and the state of
+multi-turn flows such as the weather assistant and file search.  A turn is
+either text or a mono 16-bit WAV recording, which is transcribed on the
+server:
+
+    POST   /sessions              {"lang": "en"}          -> {"id", "lang", "events"}
+    POST   /sessions/<id>/turns   {"text": "weather"}     -> reply
+                                  (or an audio/wav body)
+    DELETE /sessions/<id>
+    GET    /ws?lang=en            WebSocket, one session per connection: send
+                                  text frames ("weather" or {"text": ...}) or
+                                  binary WAV frames, get one reply per turn
+    GET    /health                sessions, turns in progress
+    GET    /metrics               per-stage latency (Prometheus)
+
+A reply is {"heard", "events", "awaiting", "ended", "lang"}.  The events are
+what JARVIS said ({"say": ...}) and did ({"action": "open_url", "target":
+...}; carrying actions out is up to the client) until it either finished
+the turn or asked a follow-up question.  In the latter case "awaiting" is
+true and the next turn is the answer.
+
+Handlers block, so every turn runs on a thread of its own, at most
+JARVIS_SERVER_WORKERS of them at a time, and speech recognition on a
+bounded pool (JARVIS_ASR_WORKERS).  A flow waiting for an answer keeps its
+thread for up to FOLLOW_UP_SECONDS but gives up its place among the
+workers until the answer arrives.  When the turn backlog is full, new
+turns get a 503.
+
+Clients can't search or open the server's own files and folders unless
+it is started with --allow-files.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import app
+import asr
+import tracing
+from session import ConversationEnded, Session, using
+
+SERVER_WORKERS = int(os.getenv("JARVIS_SERVER_WORKERS", "32"))
+ASR_WORKERS = int(os.getenv("JARVIS_ASR_WORKERS", "4"))
+MAX_SESSIONS = int(os.getenv("JARVIS_MAX_SESSIONS", "1000"))
+FOLLOW_UP_SECONDS = 60  # How long a flow waits for the answer to its question
+IDLE_SECONDS = 15 * 60  # Sessions without a turn for this long are closed
+MAX_BODY = 10 * 1024 * 1024
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           410: "Gone", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RemoteSession(Session):
+    """A client's conversation; what JARVIS says and does is sent back as the turn's reply"""
+
+    def __init__(self, session_id, lang, server, host_files=False):
+        super().__init__(lang=lang, listen=self._listen, speak=self._speak,
+                         act=self._act, session_id=session_id, host_files=host_files)
+        self.server = server
+        self.loop = server.loop
+        self.answers = queue.Queue()  # Answers to the question a flow is waiting on
+        self.events = []
+        self.reply = None  # Future of the request waiting for output
+        self.awaiting = False  # A flow is blocked in listen()
+        self.ended = False  # The user said "exit"
+        self.state = threading.Lock()  # Guards reply/awaiting between the loop and the worker
+        self.turn_lock = asyncio.Lock()  # One turn at a time
+        self.last_active = time.monotonic()
+
+    def _speak(self, text):
+        self.events.append({"say": text})
+
+    def _act(self, action, target):
+        self.events.append({"action": action, "target": target})
+
+    def _listen(self):
+        with self.state:
+            self.awaiting = True
+        self.send_reply()
+        self.server.park()
+        try:
+            text = self.answers.get(timeout=FOLLOW_UP_SECONDS)
+        except queue.Empty:
+            with self.state:
+                if self.answers.empty():  # Give up on the flow; the next message is a new turn
+                    self.awaiting = False
+                    raise ConversationEnded
+            text = self.answers.get_nowait()
+        finally:
+            self.server.resume()
+        with self.state:
+            self.awaiting = False
+        if text is None:
+            raise ConversationEnded
+        return text
+
+    def send_reply(self):
+        """Resolve the waiting request with the output so far (called on a worker thread)"""
+        with self.state:
+            reply, self.reply = self.reply, None
+            if reply is None:
+                return  # Nobody is waiting; the output goes out with the next reply
+            events, self.events = self.events, []
+            body = {"events": events, "awaiting": self.awaiting, "ended": self.ended, "lang": self.lang}
+        self.loop.call_soon_threadsafe(_resolve, reply, body)
+
+
+def _resolve(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def transcribe_wav(data, lang):
+    """Recognize a WAV recording with the configured backend"""
+    try:
+        with wave.open(io.BytesIO(data)) as wav:
+            if wav.getnchannels() != 1:
+                raise HttpError(400, "audio must be mono")
+            sample_rate, sample_width = wav.getframerate(), wav.getsampwidth()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise HttpError(400, f"not a WAV file: {e}")
+    try:
+        return asr.recognize(app.get_asr(), frames, lang, sample_rate, sample_width)
+    except Exception as e:
+        print(f"Recognition Error: {e}")
+        return ""
+
+
+class Server:
+    """Sessions, worker pools and the asyncio HTTP/WebSocket front end"""
+
+    def __init__(self, workers=SERVER_WORKERS, asr_workers=ASR_WORKERS, max_sessions=MAX_SESSIONS,
+                 max_backlog=None, idle_seconds=IDLE_SECONDS, allow_files=False):
+        self.turns = ThreadPoolExecutor(max_sessions, thread_name_prefix="turn")  # One per session at most
+        self.running = threading.BoundedSemaphore(workers)  # Held by turns running, not by flows waiting
+        self.recognizers = ThreadPoolExecutor(asr_workers, thread_name_prefix="asr")
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.max_backlog = 4 * workers if max_backlog is None else max_backlog  # Turns running or queued
+        self.idle_seconds = idle_seconds
+        self.allow_files = allow_files  # Let clients search and open this machine's files
+        self.sessions = {}
+        self.backlog = 0
+        self.loop = None
+        self.server = None
+        self.port = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self._connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._reaper = asyncio.ensure_future(self._reap())
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._reaper.cancel()
+        for session in list(self.sessions.values()):
+            self.close_session(session)
+        self.turns.shutdown(wait=False)
+        self.recognizers.shutdown(wait=False)
+
+    # Sessions and turns
+
+    def open_session(self, lang="en"):
+        if lang not in app.catalog.languages:
+            raise HttpError(400, f"unsupported language: {lang}")
+        if len(self.sessions) >= self.max_sessions:
+            raise HttpError(503, "too many sessions")
+        session = RemoteSession(uuid.uuid4().hex, lang, self, host_files=self.allow_files)
+        self.sessions[session.id] = session
+        with using(session):
+            app.say("help")
+        events, session.events = session.events, []
+        return session, {"id": session.id, "lang": lang, "events": events}
+
+    def close_session(self, session):
+        self.sessions.pop(session.id, None)
+        with session.state:
+            if session.awaiting:
+                session.answers.put(None)  # Unwinds the flow with ConversationEnded
+
+    async def turn(self, session, text=None, audio=None):
+        """Run one turn, or answer the question a flow is waiting on; returns the reply"""
+        async with session.turn_lock:
+            if session.ended:
+                raise HttpError(410, "session ended")
+            session.last_active = time.monotonic()
+            if audio is not None:
+                text = await self.loop.run_in_executor(self.recognizers, transcribe_wav, audio, session.lang)
+            heard = (text or "").strip().lower()
+            reply = self.loop.create_future()
+            with session.state:
+                answering = session.awaiting
+                if not answering and self.backlog >= self.max_backlog:
+                    raise HttpError(503, "server busy")
+                session.reply = reply
+                if answering:
+                    session.answers.put(heard)
+            if not answering:
+                self.backlog += 1
+                job = self.loop.run_in_executor(self.turns, self._run_turn, session, heard)
+                job.add_done_callback(self._turn_done)
+            body = await reply
+            session.last_active = time.monotonic()
+            return {"heard": heard, **body}
+
+    def _turn_done(self, job):
+        self.backlog -= 1
+        if not job.cancelled() and job.exception() is not None:
+            print(f"Turn Error: {job.exception()}")
+
+    def park(self):
+        """Called by a flow that starts waiting for an answer: let another turn run meanwhile"""
+        self.loop.call_soon_threadsafe(self._count, -1)
+        self.running.release()
+
+    def resume(self):
+        """Called by a parked flow once it has its answer (or gives up)"""
+        self.loop.call_soon_threadsafe(self._count, 1)
+        self.running.acquire()
+
+    def _count(self, turns):
+        self.backlog += turns
+
+    def _run_turn(self, session, command):
+        with self.running, using(session):
+            try:
+                with tracing.turn(session.id):
+                    app.handle_command(command)
+            except SystemExit:  # "exit" ends the conversation
+                session.ended = True
+            except ConversationEnded:  # The client left, or never answered
+                return
+            except Exception as e:
+                print(f"Turn Error: {e}")
+                session.events.append({"error": str(e)})
+        session.send_reply()
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(min(60, self.idle_seconds))
+            cutoff = time.monotonic() - self.idle_seconds
+            for session in list(self.sessions.values()):
+                if session.last_active < cutoff and not session.turn_lock.locked():
+                    self.close_session(session)
+
+    # HTTP
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request = headers = None
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    if headers.get("upgrade", "").lower() == "websocket":
+                        await self._websocket(reader, writer, target, headers)
+                        break
+                    status, payload = await self._route(method, target, headers, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                    request = None  # Don't trust the rest of the stream
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    print(f"Server Error: {e}")
+                    status, payload = 500, {"error": "internal error"}
+                keep_alive = request is not None and headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["health"]:
+            return 200, {"sessions": len(self.sessions), "turns": self.backlog, "workers": self.workers}
+        if parts == ["metrics"]:
+            return 200, tracing.tracer.prometheus()
+        if parts[:1] != ["sessions"] or len(parts) > 3:
+            raise HttpError(404, "not found")
+        if len(parts) == 1:
+            _allow(method, "POST")
+            options = _json_body(body) if body else {}
+            _, created = self.open_session(options.get("lang", "en"))
+            return 201, created
+        session = self.sessions.get(parts[1])
+        if session is None:
+            raise HttpError(404, "no such session")
+        if len(parts) == 2:
+            _allow(method, "DELETE")
+            self.close_session(session)
+            return 200, {"id": session.id, "closed": True}
+        if parts[2] != "turns":
+            raise HttpError(404, "not found")
+        _allow(method, "POST")
+        if headers.get("content-type", "").split(";")[0].strip() in ("audio/wav", "audio/x-wav"):
+            return 200, await self.turn(session, audio=body)
+        return 200, await self.turn(session, text=_json_body(body).get("text", ""))
+
+    # WebSocket
+
+    async def _websocket(self, reader, writer, target, headers):
+        url = urlsplit(target)
+        key = headers.get("sec-websocket-key")
+        if url.path != "/ws" or not key:
+            raise HttpError(404 if url.path != "/ws" else 400, "not a WebSocket endpoint")
+        lang = parse_qs(url.query).get("lang", ["en"])[0]
+        session, created = self.open_session(lang)
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        try:
+            writer.write(_ws_frame(WS_TEXT, json.dumps(created, ensure_ascii=False).encode()))
+            await writer.drain()
+            while True:
+                message = await _read_ws_message(reader, writer)
+                if message is None:
+                    break
+                opcode, data = message
+                try:
+                    if opcode == WS_BINARY:
+                        reply = await self.turn(session, audio=data)
+                    else:
+                        reply = await self.turn(session, text=_ws_text(data))
+                except HttpError as e:
+                    reply = {"error": e.message, "status": e.status}
+                writer.write(_ws_frame(WS_TEXT, json.dumps(reply, ensure_ascii=False).encode()))
+                await writer.drain()
+                if reply.get("ended"):
+                    writer.write(_ws_frame(WS_CLOSE, struct.pack("!H", 1000)))
+                    await writer.drain()
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.close_session(session)
+
+
+def _allow(method, allowed):
+    if method != allowed:
+        raise HttpError(405, f"use {allowed}")
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "body must be JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "body must be a JSON object")
+    return data
+
+
+async def _read_request(reader):
+    """(method, target, headers, body) of the next request; None when the client is done"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "bad request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+        if len(headers) > 100:
+            raise HttpError(400, "too many headers")
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HttpError(400, "bad Content-Length")
+    if length < 0:
+        raise HttpError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status, payload, keep_alive):
+    if isinstance(payload, str):
+        content_type, data = "text/plain; version=0.0.4; charset=utf-8", payload.encode("utf-8")
+    else:
+        content_type, data = "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + data
+
+
+def _ws_text(data):
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HttpError(400, "text frames must be UTF-8")
+    if text.lstrip().startswith("{"):
+        return _json_body(data).get("text", "")
+    return text
+
+
+def _ws_frame(opcode, data):
+    length = len(data)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + data
+
+
+async def _read_ws_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ConnectionError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    data = await reader.readexactly(length)
+    if mask and data:
+        key = (mask * (length // 4 + 1))[:length]
+        data = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+    return bool(first & 0x80), first & 0x0F, data
+
+
+async def _read_ws_message(reader, writer):
+    """(opcode, payload) of the next data message, answering pings; None once the client closes"""
+    opcode, parts = None, []
+    while True:
+        fin, frame_opcode, data = await _read_ws_frame(reader)
+        if frame_opcode == WS_CLOSE:
+            writer.write(_ws_frame(WS_CLOSE, data[:2]))
+            await writer.drain()
+            return None
+        if frame_opcode == WS_PING:
+            writer.write(_ws_frame(WS_PONG, data))
+            await writer.drain()
+            continue
+        if frame_opcode == WS_PONG:
+            continue
+        if frame_opcode:  # Continuation frames carry opcode 0
+            opcode = frame_opcode
+        parts.append(data)
+        if sum(map(len, parts)) > MAX_BODY:
+            raise ConnectionError("WebSocket message too large")
+        if fin:
+            return opcode, b"".join(parts)
+
+
+async def serve(host, port, **options):
+    server = await Server(**options).start(host, port)
+    print(f"JARVIS server listening on http://{host}:{server.port} "
+          f"({server.workers} turn workers, WebSocket at /ws)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve JARVIS sessions over HTTP and WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Turns handled at once")
+    parser.add_argument("--asr-workers", type=int, default=ASR_WORKERS, help="Recordings transcribed at once")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--allow-files", action="store_true",
+                        help="Let clients search and open files and folders on this machine")
+    args = parser.parse_args()
+
+    if args.allow_files:
+        app.file_index.refresh_in_background()
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, asr_workers=args.asr_workers,
+                          max_sessions=args.max_sessions, allow_files=args.allow_files))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
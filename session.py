@@ -0,0 +1,57 @@
+"""Per-conversation state, so several conversations can share one process"""
+import contextlib
+import contextvars
+
+
+class ConversationEnded(BaseException):
+    """The conversation has no more utterances: a script ran out, or a client left.
+
+    Raised from a session's listen() hook.  A BaseException, like SystemExit,
+    so the handlers' `except Exception` blocks don't swallow it in the middle
+    of a multi-turn flow.
+    """
+
+
+class Session:
+    """Language and I/O hooks for one conversation.
+
+    The hooks default to None, which means the real microphone, speakers,
+    browser and OS.  Other frontends pass their own:
+
+        listen()              -> the next user utterance (ConversationEnded
+                                 when there won't be one)
+        speak(text)           -> deliver a response
+        act(action, target)   -> side effects ("open_url", "open_path",
+                                 "lock", "brightness")
+
+    host_files=False keeps the conversation away from this machine's files
+    (file search, opening folders), e.g. for remote clients.
+    """
+
+    def __init__(self, lang="en", listen=None, speak=None, act=None, session_id=None, host_files=True):
+        self.lang = lang
+        self.listen = listen
+        self.speak = speak
+        self.act = act
+        self.id = session_id
+        self.host_files = host_files
+        self.conversation = None  # LLM history, created on first use
+
+
+default_session = Session()
+_current = contextvars.ContextVar("jarvis_session")
+
+
+def current_session():
+    """The session of the conversation running in this thread/task"""
+    return _current.get(default_session)
+
+
+@contextlib.contextmanager
+def using(session):
+    """Make `session` current for the code inside the with block"""
+    token = _current.set(session)
+    try:
+        yield session
+    finally:
+        _current.reset(token)
@@ -0,0 +1,299 @@
+"""Per-stage latency tracing for conversation turns.
+
+A turn runs from listening for a command until its handler returns.  Code
+marks its stages with
+
+    with tracing.stage("asr"):
+        ...
+
+and every stage is recorded against the turn's intent: in a rolling
+histogram (p50/p95/p99 over the last `window` samples), in a JSONL trace
+log and in a Prometheus text file.  Stages that finish on other threads
+after the turn (synthesis, playback) are still attributed to it, as long as
+the thread runs in a copy of the turn's context.  Outside a turn, or with
+JARVIS_TRACE=0, stage() is a shared no-op context manager.
+
+    python tracing.py [traces.jsonl] [--intent weather]    # latency summary
+"""
+import argparse
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+_NULL = contextlib.nullcontext()
+_current = contextvars.ContextVar("jarvis_turn", default=None)
+QUANTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    """Percentiles over the most recent `window` samples, plus all-time count and sum"""
+
+    def __init__(self, window=1000):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, p):
+        values = sorted(self.samples)
+        return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+class Turn:
+    _ids = itertools.count(1)
+
+    def __init__(self, session=None):
+        self.id = next(self._ids)
+        self.session = session
+        self.intent = None
+        self.time = time.time()
+        self.started = time.perf_counter()
+        self.pending = []  # Stages waiting for the intent to be known
+        self.done = False
+
+
+class Tracer:
+    """Collects stage timings and exports them.
+
+    The Prometheus file is rewritten at most every `export_interval` seconds
+    and on close().  Once the trace log reaches `max_trace_bytes` it is
+    renamed to <trace_path>.1 (replacing the previous one) and a new log is
+    started, so the two together stay under twice that size.
+    """
+
+    def __init__(self, enabled=True, trace_path=None, metrics_path=None, window=1000, export_interval=10,
+                 max_trace_bytes=10 * 1024 * 1024):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.max_trace_bytes = max_trace_bytes
+        self.metrics_path = metrics_path
+        self.window = window
+        self.export_interval = export_interval
+        self.histograms = {}  # (intent, stage) -> RollingHistogram
+        self._lock = threading.Lock()
+        self._trace_file = None
+        self._trace_bytes = 0
+        self._exported = time.monotonic()
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+
+    @contextlib.contextmanager
+    def turn(self, session=None):
+        """Trace the code inside the with block as one turn"""
+        if not self.enabled:
+            yield None
+            return
+        turn = Turn(session)
+        token = _current.set(turn)
+        try:
+            yield turn
+        finally:
+            _current.reset(token)
+            self._finish(turn)
+
+    def stage(self, name):
+        """Context manager timing one stage of the current turn"""
+        if not self.enabled:
+            return _NULL
+        turn = _current.get()
+        if turn is None:
+            return _NULL
+        return self._timed(turn, name)
+
+    def record(self, name, seconds, end=None):
+        """Record a stage measured elsewhere that took `seconds` and ended at `end` (perf_counter)"""
+        turn = _current.get() if self.enabled else None
+        if turn is not None:
+            end = time.perf_counter() if end is None else end
+            self._record(turn, name, end - seconds, seconds)
+
+    def set_intent(self, intent):
+        turn = _current.get()
+        if turn is not None:
+            turn.intent = intent
+
+    def summary(self):
+        """[(intent, stage, count, p50, p95, p99)] in seconds"""
+        with self._lock:
+            return sorted((intent, stage, h.count, *(h.percentile(q) for q in QUANTILES))
+                          for (intent, stage), h in self.histograms.items())
+
+    def prometheus(self):
+        lines = ["# HELP jarvis_stage_latency_seconds Latency of each stage of a turn, by intent",
+                 "# TYPE jarvis_stage_latency_seconds summary"]
+        with self._lock:
+            for (intent, stage), h in sorted(self.histograms.items()):
+                labels = f'intent="{_escape(intent)}",stage="{_escape(stage)}"'
+                for q in QUANTILES:
+                    lines.append(f'jarvis_stage_latency_seconds{{{labels},quantile="{q / 100}"}} '
+                                 f"{h.percentile(q):.6f}")
+                lines.append(f"jarvis_stage_latency_seconds_sum{{{labels}}} {h.sum:.6f}")
+                lines.append(f"jarvis_stage_latency_seconds_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Write the Prometheus file and flush the trace log"""
+        with self._lock:
+            self._exported = time.monotonic()
+            if self._trace_file is not None:
+                self._trace_file.flush()
+        if not self.metrics_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+            tmp = f"{self.metrics_path}.{threading.get_ident()}.tmp"  # close() may race a turn's export
+            with open(tmp, "w", encoding="utf-8") as fp:
+                fp.write(self.prometheus())
+            os.replace(tmp, self.metrics_path)
+        except OSError as e:
+            print(f"Metrics Error: {e}")
+
+    def close(self):
+        if not self.enabled:
+            return
+        self.export()
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+
+    @contextlib.contextmanager
+    def _timed(self, turn, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(turn, name, start, time.perf_counter() - start)
+
+    def _record(self, turn, name, start, seconds):
+        with self._lock:
+            if turn.done:
+                self._add(turn, name, start, seconds)
+            else:
+                turn.pending.append((name, start, seconds))
+
+    def _finish(self, turn):
+        end = time.perf_counter()
+        with self._lock:
+            turn.done = True
+            turn.intent = turn.intent or "none"
+            for name, start, seconds in turn.pending:
+                self._add(turn, name, start, seconds)
+            turn.pending = []
+            self._add(turn, "turn", turn.started, end - turn.started)
+            due = time.monotonic() - self._exported >= self.export_interval
+            if due:  # Claimed here, so turns finishing together export once
+                self._exported = time.monotonic()
+        if due:
+            self.export()
+
+    def _add(self, turn, name, start, seconds):
+        # Caller holds self._lock
+        key = (turn.intent, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = RollingHistogram(self.window)
+        histogram.add(seconds)
+        if self.trace_path:
+            if self._trace_file is None:
+                try:
+                    os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+                    self._trace_file = open(self.trace_path, "a", encoding="utf-8")
+                    self._trace_bytes = self._trace_file.tell()
+                except OSError as e:
+                    print(f"Trace Error: {e}")
+                    self.trace_path = None
+                    return
+            line = json.dumps({
+                "turn": turn.id, "session": turn.session, "time": round(turn.time, 3),
+                "intent": turn.intent, "stage": name,
+                "start_ms": round((start - turn.started) * 1000, 3), "ms": round(seconds * 1000, 3),
+            }, ensure_ascii=False) + "\n"
+            self._trace_file.write(line)
+            self._trace_bytes += len(line.encode("utf-8"))
+            if self.max_trace_bytes and self._trace_bytes >= self.max_trace_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        # Caller holds self._lock; the next _add() opens a fresh log
+        self._trace_file.close()
+        self._trace_file = None
+        try:
+            os.replace(self.trace_path, self.trace_path + ".1")
+        except OSError as e:
+            print(f"Trace Error: {e}")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+tracer = Tracer(enabled=os.getenv("JARVIS_TRACE", "1") != "0")
+
+
+def turn(session=None):
+    return tracer.turn(session)
+
+
+def stage(name):
+    return tracer.stage(name)
+
+
+def record(name, seconds, end=None):
+    tracer.record(name, seconds, end)
+
+
+def set_intent(intent):
+    tracer.set_intent(intent)
+
+
+def summarize(path, intent=None, window=1000):
+    """Rebuild the latency summary from a JSONL trace log"""
+    collected = Tracer(window=window)
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if intent is not None and row["intent"] != intent:
+                continue
+            key = (row["intent"], row["stage"])
+            if key not in collected.histograms:
+                collected.histograms[key] = RollingHistogram(window)
+            collected.histograms[key].add(row["ms"] / 1000)
+    return collected
+
+
+def main():
+    data_dir = os.getenv("JARVIS_DATA_DIR", os.path.expanduser("~/.jarvis"))
+    parser = argparse.ArgumentParser(description="Per-intent stage latency from a JARVIS trace log")
+    parser.add_argument("path", nargs="?", default=os.path.join(data_dir, "traces.jsonl"))
+    parser.add_argument("--intent", help="Only this intent")
+    parser.add_argument("--window", type=int, default=1000, help="Percentiles over the last N samples")
+    parser.add_argument("--prometheus", action="store_true", help="Print Prometheus text instead")
+    args = parser.parse_args()
+
+    collected = summarize(args.path, args.intent, args.window)
+    if args.prometheus:
+        print(collected.prometheus(), end="")
+        return
+    print(f"{'intent':<12} {'stage':<20} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for intent, name, count, *quantiles in collected.summary():
+        print(f"{intent:<12} {name:<20} {count:>7} " + " ".join(f"{q * 1000:9.1f}" for q in quantiles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Disk-backed LRU cache of synthesized speech"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+INDEX_FILE = "index.json"
+
+
+def cache_key(lang, voice, rate, text):
+    """Content address of one rendered utterance"""
+    raw = "\x1f".join([lang, str(voice), str(rate), text])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Rendered audio files keyed by (language, voice, rate, text).
+
+    Entries live as plain files in `directory`; the index keeps them in
+    least-recently-used order and the oldest are deleted once the total
+    size goes over `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (filename, size), oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as fp:
+                saved = json.load(fp)
+        except (OSError, ValueError):
+            return
+        for key, filename, size in saved:
+            if os.path.exists(os.path.join(self.directory, filename)):
+                self.entries[key] = (filename, size)
+                self.total_bytes += size
+
+    def save(self):
+        """Write the LRU order to disk (called after inserts and at exit)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [[key, filename, size] for key, (filename, size) in self.entries.items()]
+            self._dirty = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = os.path.join(self.directory, f"{INDEX_FILE}.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump(rows, fp)
+            os.replace(tmp, os.path.join(self.directory, INDEX_FILE))
+        except OSError as e:
+            print(f"Audio Cache Error: {e}")
+
+    def get(self, key):
+        """Path of the cached audio for `key`, or None"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self._dirty = True
+            return os.path.join(self.directory, entry[0])
+
+    def render(self, lang, voice, rate, text, synthesize, ext=".wav"):
+        """Return a file with `text` spoken, calling synthesize(text, path) on a miss"""
+        key = cache_key(lang, voice, rate, text)
+        path = self.get(key)
+        if path is not None:
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        filename = key + ext
+        path = os.path.join(self.directory, filename)
+        # Per-thread, since sessions may synthesize the same text at once; keep the
+        # extension, some synthesizers look at it
+        tmp = f"{path}.{threading.get_ident()}.part{ext}"
+        synthesize(text, tmp)
+        os.replace(tmp, path)
+        self._add(key, filename, os.path.getsize(path))
+        self.save()
+        return path
+
+    def store(self, lang, voice, rate, text, data, ext=".wav"):
+        """Cache audio that was synthesized in memory; returns its path"""
+        key = cache_key(lang, voice, rate, text)
+        os.makedirs(self.directory, exist_ok=True)
+        filename = key + ext
+        path = os.path.join(self.directory, filename)
+        tmp = f"{path}.{threading.get_ident()}.part"
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+        self._add(key, filename, len(data))
+        self.save()
+        return path
+
+    def _add(self, key, filename, size):
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[key] = (filename, size)
+            self.total_bytes += size
+            self._dirty = True
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (old_name, old_size) = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                try:
+                    os.remove(os.path.join(self.directory, old_name))
+                except OSError:
+                    pass
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,83 @@
+"""Streamed synthesis: speak long text chunk by chunk while the rest is synthesized"""
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from llm_stream import stream_sentences
+from tts_cache import cache_key
+
+# gTTS sends at most 100 characters per request and makes longer text
+# one request after another; chunks of that size go out in parallel instead
+MAX_CHUNK_CHARS = 100
+BREAKS = ((",", ";", ":", "—"), (" ",))  # Where to cut a long sentence, best first
+
+
+def split_chunks(text, max_chars=MAX_CHUNK_CHARS, min_chars=12):
+    """Sentence-sized pieces of `text`; sentences over `max_chars` are cut at a comma or space"""
+    chunks = []
+    for sentence in stream_sentences([text], min_chars):
+        while len(sentence) > max_chars:
+            cut = -1
+            for separators in BREAKS:
+                cut = max(sentence.rfind(s, 0, max_chars) for s in separators)
+                if cut > 0:
+                    break
+            if cut <= 0:
+                cut = max_chars - 1
+            chunks.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+class StreamingSynthesizer:
+    """Synthesizes the chunks of an utterance concurrently, into memory.
+
+    `synthesize(text, fp)` writes the audio for one chunk to a file object.
+    render() submits every chunk at once to a pool of `workers` threads and
+    returns the clips in order as they become ready, so the first one can
+    play while the others are still being synthesized.  Clips are in-memory
+    buffers; with a `cache` (tts_cache.AudioCache) they are also stored under
+    `voice` and served from disk next time.
+    """
+
+    def __init__(self, synthesize, workers=4, cache=None, voice=("hi", "gtts", 0), ext=".mp3",
+                 max_chars=MAX_CHUNK_CHARS):
+        self.synthesize = synthesize
+        self.cache = cache
+        self.voice = voice
+        self.ext = ext
+        self.max_chars = max_chars
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="tts")
+
+    def render(self, text):
+        """A generator of playable clips (paths or BytesIO), one per chunk of `text`"""
+        return self._clips([self._submit(chunk) for chunk in split_chunks(text, self.max_chars)])
+
+    def _clips(self, futures):
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:  # Cancelled speech: don't synthesize what won't be played
+                future.cancel()
+
+    def _submit(self, chunk):
+        if self.cache is not None:
+            path = self.cache.get(cache_key(*self.voice, chunk))
+            if path is not None:
+                future = Future()
+                future.set_result(path)
+                return future
+        return self._pool.submit(self._render_chunk, chunk)
+
+    def _render_chunk(self, chunk):
+        buffer = io.BytesIO()
+        self.synthesize(chunk, buffer)
+        data = buffer.getvalue()
+        if self.cache is not None:
+            try:
+                self.cache.store(*self.voice, chunk, data, self.ext)
+            except OSError as e:
+                print(f"Audio Cache Error: {e}")
+        return io.BytesIO(data)
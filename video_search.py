@@ -0,0 +1,173 @@
+"""YouTube search with a persistent cache, speculative prefetch and a result picker"""
+import contextvars
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import tracing
+from intent_router import is_word_char
+
+# Words that change how a request is said, not what is being asked for
+FILLER_PHRASES = ("on youtube", "from youtube", "in youtube", "यूट्यूब पर")
+FILLER_WORDS = {"please", "song", "songs", "video", "videos", "music", "track", "गाना", "गाने", "वीडियो"}
+LEADING_WORDS = {"play", "the", "a", "an", "some", "चलाओ"}
+TRAILING_WORDS = {"चलाओ", "please"}
+# Versions people rarely mean unless they ask for them
+UNWANTED = {"reaction", "cover", "karaoke", "remix", "slowed", "reverb", "8d", "instrumental", "shorts"}
+FIELDS = ("title", "channel", "duration", "views", "url_suffix")  # Kept from each result
+
+
+def normalize_query(text):
+    """Cache key for a spoken search: "Play the Despacito song!" -> "despacito" """
+    text = "".join(ch if is_word_char(ch) else " " for ch in text.lower())
+    text = " " + " ".join(text.split()) + " "
+    for phrase in FILLER_PHRASES:
+        text = text.replace(f" {phrase} ", " ")
+    words = [w for w in text.split() if w not in FILLER_WORDS]
+    while words and words[0] in LEADING_WORDS:
+        words.pop(0)
+    while words and words[-1] in TRAILING_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def search_terms(text):
+    """What to send to YouTube: the request as said, minus the "play" verb"""
+    words = text.split()
+    if words and words[0].lower() == "play":
+        words.pop(0)
+    if words and words[-1] == "चलाओ":
+        words.pop()
+    return " ".join(words) or " ".join(text.split())
+
+
+def _views(result):
+    digits = re.sub(r"\D", "", str(result.get("views") or ""))
+    return int(digits) if digits else 0
+
+
+def score(result, query):
+    """How likely `result` is the video meant by `query` (higher is better)"""
+    wanted = set(normalize_query(query).split())
+    title = set(normalize_query(result.get("title") or "").split())
+    overlap = len(wanted & title) / len(wanted) if wanted else 0.0
+    value = overlap + 0.02 * math.log10(_views(result) + 1)
+    if "official" in title:
+        value += 0.2
+    value -= 0.3 * len((UNWANTED & title) - wanted)
+    if str(result.get("url_suffix", "")).startswith("/shorts") and "shorts" not in wanted:
+        value -= 0.5
+    return value
+
+
+def pick_video(results, query):
+    """The best match for `query` among the search results, or None; ties go to the higher-ranked result"""
+    if not results:
+        return None
+    return max(reversed(results), key=lambda result: score(result, query))
+
+
+class VideoSearch:
+    """Search results cached on disk by normalized query.
+
+    `search(query, max_results)` is the backend (a YoutubeSearch scrape).
+    Entries expire after `ttl` seconds, and beyond `max_entries` the least
+    recently used are dropped.  prefetch() starts a search in the background
+    so it can run while a prompt is spoken; a search for a query that is
+    already being fetched waits for that fetch instead of starting another.
+    """
+
+    def __init__(self, search, path=None, ttl=7 * 24 * 60 * 60, max_entries=500, max_results=5, workers=2):
+        self._search = search
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self.entries = OrderedDict()  # key -> (expires_at, results), oldest first
+        self.stats = {"searches": 0, "cache_hits": 0, "coalesced": 0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="youtube")
+        self._load()
+
+    def prefetch(self, query):
+        """Start searching for `query`; returns a Future of the results"""
+        key = normalize_query(query) or " ".join(query.lower().split())
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                future = Future()
+                future.set_result(entry[1])
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            self.stats["searches"] += 1
+            # In the caller's context, so the search is traced as part of its turn.  The
+            # key only groups wordings; YouTube gets the words as the user said them
+            future = self._inflight[key] = self._pool.submit(contextvars.copy_context().run, self._fetch,
+                                                             key, search_terms(query))
+        return future
+
+    def search(self, query):
+        return self.prefetch(query).result()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+        self.save()
+
+    def _fetch(self, key, terms):
+        try:
+            with tracing.stage("net:youtube"):
+                found = self._search(terms, self.max_results)
+            results = [{field: result.get(field) for field in FIELDS} for result in found or []]
+            if results:  # An empty page is more likely a failed scrape than a real answer
+                with self._lock:
+                    self.entries[key] = (time.time() + self.ttl, results)
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+                self.save()
+            return results
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                saved = json.load(fp)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, expires, results in saved[-self.max_entries:]:
+            if expires > now:
+                self.entries[key] = (expires, results)
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            rows = [[key, expires, results] for key, (expires, results) in self.entries.items() if expires > now]
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as fp:
+                    json.dump(rows, fp, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"YouTube Cache Error: {e}")